@@ -1,6 +1,5 @@
 import { NextResponse } from 'next/server';
 import db from '@/lib/db';
-import { updateClusterHotScore } from '@/lib/actions/news';
 import { cookies } from 'next/headers';
 
 export async function POST(request) {
@@ -25,32 +24,18 @@ export async function POST(request) {
         // Tìm bài viết dựa trên URL hoặc ID
         let news;
         if (url) {
-            news = db.prepare('SELECT id, cluster_id FROM news WHERE url = ?').get(url);
+            news = db.prepare('SELECT id FROM news WHERE url = ?').get(url);
         } else {
-            news = db.prepare('SELECT id, cluster_id FROM news WHERE id = ?').get(newsId);
+            news = db.prepare('SELECT id FROM news WHERE id = ?').get(newsId);
         }
 
         if (!news) {
             return NextResponse.json({ error: 'News not found' }, { status: 404 });
         }
 
-        // Thực hiện trong transaction
-        const transaction = db.transaction(() => {
-            // 1. Tăng view_count tổng trong bảng news
-            db.prepare('UPDATE news SET view_count = view_count + 1 WHERE id = ?').run(news.id);
-
-            // 2. Chỉ ghi log vào read_logs nếu là thành viên đã đăng nhập
-            if (userId) {
-                db.prepare('INSERT INTO read_logs (user_id, news_id, url) VALUES (?, ?, ?)').run(userId, news.id, url || news.url);
-            }
-
-            // 3. Cập nhật hot_score cho cluster
-            if (news.cluster_id) {
-                updateClusterHotScore(news.cluster_id);
-            }
-        });
-
-        transaction();
+        // Chỉ ghi một dòng vào hàng đợi; pybig/view_ingest.py cộng view_count,
+        // ghi read_logs cho thành viên và cập nhật cluster theo lô
+        db.prepare('INSERT INTO view_events (news_id, user_id, url) VALUES (?, ?, ?)').run(news.id, userId, url || null);
 
         return NextResponse.json({ success: true });
     } catch (error) {
@@ -1,7 +1,6 @@
 import { NextResponse } from 'next/server';
-import db from '@/lib/db';
+import db, { bumpClusterStats, refreshClusterRepresentative } from '@/lib/db';
 import { cookies } from 'next/headers';
-import { updateClusterHotScore } from '@/lib/actions/news';
 
 export async function POST(request) {
     try {
@@ -53,8 +52,11 @@ export async function POST(request) {
             const news = db.prepare('SELECT cluster_id FROM news WHERE id = ?').get(newsId);
 
             if (news && news.cluster_id) {
-                // 3. Tự động cập nhật hot_score cho cluster
-                updateClusterHotScore(news.cluster_id);
+                // 3. Cộng bộ đếm và chọn lại bài đại diện (bài này có thể vừa bị ẩn).
+                //    Bucket giờ vừa ghi đánh dấu cluster: lần tính hot score kế tiếp
+                //    của pybig (hot_score.update_hot_scores) sẽ chấm lại điểm
+                bumpClusterStats(news.cluster_id, { reports: 1 });
+                refreshClusterRepresentative(news.cluster_id);
             }
         });
 
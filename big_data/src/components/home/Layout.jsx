@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState } from "react";
+import React, { useState, useEffect } from "react";
 import { useSearchParams, useRouter } from "next/navigation";
 import NewsCard from "./NewsCard";
 import Navigation from "./Navigation";
@@ -9,12 +9,28 @@ import TrendingNews from "./TrendingNews";
 import NewsFeed from "./NewsFeed";
 import StickyHeader from "./StickyHeader";
 import Footer from "./Footer";
+import { getHotClustersByCategory } from "@/lib/actions/news";
 
 const Layout = ({ user, categories = [], news = [], clusters = [], hotToday = [] }) => {
   const [activeCategory, setActiveCategory] = useState(null);
   const searchParams = useSearchParams();
   const clusterId = searchParams.get("cluster_id");
   const router = useRouter();
+  const [categoryClusters, setCategoryClusters] = useState(null);
+
+  // Khi chọn chuyên mục: cột phải hiển thị cluster nóng của chuyên mục đó
+  useEffect(() => {
+    if (!activeCategory || activeCategory === 'latest') {
+      setCategoryClusters(null);
+      return;
+    }
+
+    let cancelled = false;
+    getHotClustersByCategory(activeCategory, 30).then((result) => {
+      if (!cancelled) setCategoryClusters(result);
+    });
+    return () => { cancelled = true; };
+  }, [activeCategory]);
 
   const handleCategoryChange = (slug) => {
     setActiveCategory(slug);
@@ -48,7 +64,7 @@ const Layout = ({ user, categories = [], news = [], clusters = [], hotToday = []
           />
         </div>
         <div className="w-79.5 shrink-0">
-          <TrendingNews clusters={clusters} />
+          <TrendingNews clusters={categoryClusters?.length ? categoryClusters : clusters} />
           <div className="flex flex-row justify-between items-center p-3 rounded-lg mt-6 bg-qr">
             <div className="pr-2">
               <div className="text-sm leading-6 font-medium text-black mb-0.75">
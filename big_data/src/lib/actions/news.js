@@ -7,81 +7,6 @@ import db from '@/lib/db';
 // =========================
 const REPORT_FILTER = `(report_count < 10 OR (report_count * 1.0 / MAX(view_count, 1) < 0.01))`;
 
-export async function updateClusterHotScore(clusterId) {
-  try {
-    const HOT_DECAY_HOURS = 12.0;
-
-    const sql = `
-      UPDATE clusters
-    SET hot_score = (
-      MAX(0,
-        (
-          -- 1. Base score by cluster size
-          CASE
-            WHEN size = 1 THEN 0.3
-            WHEN size = 2 THEN 1.0
-            ELSE LOG(size + 1) * 2.5
-          END
-
-          -- 2. View boost (total + recent)
-          + COALESCE((
-              SELECT
-                (LOG(1 + SUM(COALESCE(view_count, 0))) * 0.4)
-                + (LOG(1 + COUNT(rl.id)) * 0.6)
-              FROM news n
-              LEFT JOIN read_logs rl
-                ON rl.url = n.url
-              AND rl.read_at >= datetime('now', '-24 hours')
-              WHERE n.cluster_id = clusters.id
-            ), 0)
-
-          -- 3. Soft report penalty (view-aware)
-          - COALESCE((
-              SELECT
-                MIN(
-                  1.5,
-                  LOG(1 + SUM(report_count)) *
-                  (1 - EXP(-SUM(COALESCE(view_count, 0)) * 1.0 / 50))
-                )
-              FROM news
-              WHERE cluster_id = clusters.id
-            ), 0)
-        )
-      )
-
-      -- 4. Time decay
-      * EXP(
-          -(
-            (julianday('now') - julianday(COALESCE(last_update, created_at)))
-            * 24.0
-            / ${HOT_DECAY_HOURS}
-          )
-        )
-
-      -- 5. Recent activity boost (clamped)
-      * (
-          1.0 + MIN(
-            COALESCE((
-              SELECT COUNT(*) * 0.1
-              FROM news n
-              WHERE n.cluster_id = clusters.id
-                AND (julianday('now') - julianday(n.published_at)) * 24.0 <= ${HOT_DECAY_HOURS}
-            ), 0),
-            1.0
-          )
-        )
-    )
-    WHERE id = ?;
-    `;
-
-    db.prepare(sql).run(clusterId);
-    return true;
-  } catch (e) {
-    console.error('updateClusterHotScore error:', e);
-    return false;
-  }
-}
-
 const cleanForClient = (item) => {
   if (!item) return item;
   const { embedding, centroid, ...rest } = item;
@@ -102,6 +27,42 @@ const cleanForClient = (item) => {
 
 const cleanArrayForClient = (array = []) => array.map(cleanForClient);
 
+// Đọc bảng xếp hạng do pybig tính sẵn (rankings.py): quét theo khóa chính.
+// Bài đại diện lấy từ clusters (route report cập nhật ngay, không chờ chu kỳ sau).
+// scopeId: category_id khi scope = 'category', 0 cho các scope còn lại.
+// Trả về [] nếu scheduler chưa ghi bảng.
+const readRanking = (scope, limit, offset = 0, { scopeId = 0, scoreAs = 'ranking_score', where = '' } = {}) => {
+  const sql = `
+    SELECT
+      c.id AS cluster_id,
+      c.category_id,
+      c.size,
+      c.hot_score,
+      c.created_at,
+      c.last_update,
+      cat.name AS category,
+      cat.slug AS category_slug,
+      n.id AS news_id,
+      n.title,
+      n.url,
+      n.image_url,
+      n.summary,
+      n.source,
+      strftime('%Y-%m-%dT%H:%M:%S', n.published_at) AS published_at,
+      r.score AS ${scoreAs}
+    FROM cluster_rankings r
+    JOIN clusters c ON c.id = r.cluster_id
+    JOIN news n ON n.id = c.representative_news_id
+    LEFT JOIN categories cat ON cat.id = c.category_id
+    WHERE r.scope = ? AND r.scope_id = ?
+    ${where}
+    ORDER BY r.rank
+    LIMIT ? OFFSET ?;
+  `;
+
+  return db.prepare(sql).all(scope, scopeId, limit, offset);
+};
+
 // =========================
 // CATEGORIES
 // =========================
@@ -119,10 +80,16 @@ export async function getCategories() {
 }
 
 // =========================
-// HOT CLUSTERS (GLOBAL)
+// HOT CLUSTERS (GLOBAL / CATEGORY)
 // =========================
-export async function getHotClusters(limit = 10, offset = 0) {
+export async function getHotClusters(limit = 10, offset = 0, categoryId = null) {
   try {
+    const ranked = categoryId
+      ? readRanking('category', limit, offset, { scopeId: categoryId })
+      : readRanking('global', limit, offset);
+    if (ranked.length) return cleanArrayForClient(ranked);
+
+    // Chưa có bảng xếp hạng (hoặc vượt quá RANKING_GLOBAL_SIZE / RANKING_SIZE): tính trực tiếp
     const sql = `
       SELECT
         c.id AS cluster_id,
@@ -142,20 +109,14 @@ export async function getHotClusters(limit = 10, offset = 0) {
         cat.slug AS category_slug
       FROM clusters c
       LEFT JOIN categories cat ON cat.id = c.category_id
-      JOIN news n ON n.id = (
-        SELECT id
-        FROM news
-        WHERE cluster_id = c.id
-        AND ${REPORT_FILTER}
-        ORDER BY published_at DESC
-        LIMIT 1
-      )
+      JOIN news n ON n.id = c.representative_news_id
+      ${categoryId ? 'WHERE c.category_id = @categoryId' : ''}
       ORDER BY c.hot_score DESC
-      LIMIT ? OFFSET ?;
+      LIMIT @limit OFFSET @offset;
     `;
 
     const stmt = db.prepare(sql);
-    const clusters = stmt.all(limit, offset);
+    const clusters = stmt.all(categoryId ? { categoryId, limit, offset } : { limit, offset });
 
     return cleanArrayForClient(clusters);
   } catch (error) {
@@ -164,11 +125,30 @@ export async function getHotClusters(limit = 10, offset = 0) {
   }
 }
 
+// Cluster nóng của một chuyên mục (scope 'category' của cluster_rankings)
+export async function getHotClustersByCategory(slug, limit = 10, offset = 0) {
+  try {
+    const category = db.prepare('SELECT id FROM categories WHERE slug = ?').get(slug);
+    if (!category) return [];
+
+    return await getHotClusters(limit, offset, category.id);
+  } catch (e) {
+    console.error('getHotClustersByCategory error:', e);
+    return [];
+  }
+}
+
 // =========================
 // HOT TODAY
 // =========================
 export async function getFeaturedClustersToday(limit = 7) {
   try {
+    const ranked = readRanking('today', limit, 0, {
+      scoreAs: 'featured_score',
+      where: `AND c.representative_published_at >= date('now', 'localtime')`,
+    });
+    if (ranked.length) return cleanArrayForClient(ranked);
+
     const sql = `
       SELECT
         c.id AS cluster_id,
@@ -194,15 +174,8 @@ export async function getFeaturedClustersToday(limit = 7) {
 
       FROM clusters c
       JOIN categories cat ON cat.id = c.category_id
-      JOIN news n ON n.id = (
-        SELECT id
-        FROM news
-        WHERE cluster_id = c.id
-        AND ${REPORT_FILTER}
-        ORDER BY published_at DESC
-        LIMIT 1
-      )
-      WHERE n.published_at >= date('now', 'localtime')
+      JOIN news n ON n.id = c.representative_news_id
+      WHERE c.representative_published_at >= date('now', 'localtime')
       ORDER BY featured_score DESC
       LIMIT ?;
     `;
@@ -219,6 +192,12 @@ export async function getFeaturedClustersToday(limit = 7) {
 // =========================
 export async function getHotClustersTrending(limit = 10) {
   try {
+    const ranked = readRanking('trending', limit, 0, {
+      scoreAs: 'trending_score',
+      where: `AND c.representative_published_at >= datetime('now', '-48 hours')`,
+    });
+    if (ranked.length) return cleanArrayForClient(ranked);
+
     const sql = `
       SELECT
         c.id AS cluster_id,
@@ -241,15 +220,8 @@ export async function getHotClustersTrending(limit = 10) {
 
       FROM clusters c
       JOIN categories cat ON cat.id = c.category_id
-      JOIN news n ON n.id = (
-        SELECT id
-        FROM news
-        WHERE cluster_id = c.id
-        AND ${REPORT_FILTER}
-        ORDER BY published_at DESC
-        LIMIT 1
-      )
-      WHERE n.published_at >= datetime('now', '-48 hours')
+      JOIN news n ON n.id = c.representative_news_id
+      WHERE c.representative_published_at >= datetime('now', '-48 hours')
       ORDER BY trending_score DESC
       LIMIT ?;
     `;
@@ -553,24 +525,31 @@ export async function getRecommendedClusters(userId = null, limit = 10, offset =
 
       FROM clusters c
       LEFT JOIN categories cat ON cat.id = c.category_id
-      JOIN news n ON n.id = (
-        SELECT id
-        FROM news
-        WHERE cluster_id = c.id
-          AND ${REPORT_FILTER}
-          -- LỌC: Không hiện lại tin đã đọc
-          AND id NOT IN (SELECT news_id FROM read_logs WHERE user_id = ?)
-          -- LỌC: Không hiện tin đã báo cáo
-          AND id NOT IN (SELECT news_id FROM reports WHERE user_id = ?)
-        ORDER BY published_at DESC
-        LIMIT 1
-      )
+      -- Bài đại diện tính sẵn; nếu user đã đọc / đã báo cáo bài đó thì lấy
+      -- bài mới nhất khác trong cluster mà user chưa đọc / chưa báo cáo
+      JOIN news n ON n.id = CASE
+        WHEN c.representative_news_id NOT IN (SELECT news_id FROM read_logs WHERE user_id = @userId)
+         AND c.representative_news_id NOT IN (SELECT news_id FROM reports WHERE user_id = @userId)
+        THEN c.representative_news_id
+        ELSE (
+          SELECT id
+          FROM news
+          WHERE cluster_id = c.id
+            AND ${REPORT_FILTER}
+            -- LỌC: Không hiện lại tin đã đọc
+            AND id NOT IN (SELECT news_id FROM read_logs WHERE user_id = @userId)
+            -- LỌC: Không hiện tin đã báo cáo
+            AND id NOT IN (SELECT news_id FROM reports WHERE user_id = @userId)
+          ORDER BY published_at DESC
+          LIMIT 1
+        )
+      END
 
       ORDER BY recommendation_score DESC
-      LIMIT ? OFFSET ?;
+      LIMIT @limit OFFSET @offset;
     `;
 
-    const clusters = db.prepare(sql).all(userId, userId, limit, offset);
+    const clusters = db.prepare(sql).all({ userId, limit, offset });
 
     // Nếu sau khi lọc mà không đủ tin, có thể fallback về hot clusters (nhưng thường là đủ)
     if (clusters.length === 0 && offset === 0) {
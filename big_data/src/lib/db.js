@@ -8,4 +8,49 @@ const db = new Database(dbPath, { verbose: console.log });
 db.function('log', (val) => val <= 0 ? 0 : Math.log(val));
 db.function('exp', (val) => Math.exp(val));
 
+// Cộng dồn bộ đếm của cluster (tổng + bucket giờ hiện tại), xem pybig/cluster_stats.py
+export function bumpClusterStats(clusterId, { views = 0, reads = 0, reports = 0 } = {}) {
+    db.prepare(`
+        INSERT INTO cluster_stats (cluster_id, views, reports)
+        VALUES (?, ?, ?)
+        ON CONFLICT(cluster_id) DO UPDATE SET
+            views = views + excluded.views,
+            reports = reports + excluded.reports,
+            updated_at = CURRENT_TIMESTAMP
+    `).run(clusterId, views, reports);
+
+    db.prepare(`
+        INSERT INTO cluster_stats_hourly (cluster_id, bucket, views, reads, reports)
+        VALUES (?, CAST(strftime('%s', 'now') AS INTEGER) / 3600, ?, ?, ?)
+        ON CONFLICT(cluster_id, bucket) DO UPDATE SET
+            views = views + excluded.views,
+            reads = reads + excluded.reads,
+            reports = reports + excluded.reports
+    `).run(clusterId, views, reads, reports);
+}
+
+// Chọn lại bài đại diện của cluster (mới nhất, không bị ẩn do report), xem pybig/rankings.py
+export function refreshClusterRepresentative(clusterId) {
+    db.prepare(`
+        UPDATE clusters
+        SET representative_news_id = (
+            SELECT id
+            FROM news
+            WHERE cluster_id = clusters.id
+              AND (report_count < 10 OR (report_count * 1.0 / MAX(view_count, 1) < 0.01))
+            ORDER BY published_at DESC
+            LIMIT 1
+        )
+        WHERE id = ?
+    `).run(clusterId);
+
+    db.prepare(`
+        UPDATE clusters
+        SET representative_published_at = (
+            SELECT published_at FROM news WHERE id = clusters.representative_news_id
+        )
+        WHERE id = ?
+    `).run(clusterId);
+}
+
 export default db;
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Asyncio crawl engine.
+
+Feed downloads and article downloads share one scheduler, a global
+concurrency limit and a bounded pool of connections per host, so a
+slow publisher only holds up its own requests. Articles are yielded
+as soon as their page has been fetched and extracted.
+
+Every request goes through host_guard (token bucket, retries with
+jittered backoff, circuit breaker). Parsing runs on the shared process
+pool from pipeline.py; the number of parse jobs in flight is bounded, so
+downloads wait for the parsers. At most max_articles article tasks run
+at once, the other feed entries wait in a backlog until the consumer
+takes results.
+"""
+import asyncio
+import queue
+import threading
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from config import (
+    HEADERS,
+    CRAWL_TIMEOUT,
+    CRAWL_MAX_CONCURRENCY,
+    CRAWL_PER_HOST_CONNECTIONS,
+    INGEST_QUEUE_SIZE,
+)
+from pipeline import ParsePool, get_parse_pool, parse_feed, parse_article, needs_download, put_unless_stopped
+from host_guard import host_guard, check_status, HostUnavailable
+import feed_state
+
+# (source, rss_url, entry) -> keep entry?
+EntryFilter = Callable[[str, str, Dict], bool]
+
+
+class AsyncCrawler:
+    """Crawl a list of RSS sources with bounded global / per-host concurrency"""
+
+    def __init__(
+        self,
+        max_concurrency: int = CRAWL_MAX_CONCURRENCY,
+        per_host: int = CRAWL_PER_HOST_CONNECTIONS,
+        timeout: float = CRAWL_TIMEOUT,
+        parse_pool: Optional[ParsePool] = None,
+        max_articles: int = INGEST_QUEUE_SIZE
+    ):
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp is not installed")
+
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.parse_pool = parse_pool
+        self.max_articles = max_articles
+
+        self._global_limit = None
+        self._parse_limit = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    # ==================================================
+    # FETCH
+    # ==================================================
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._host_limits[host] = sem
+        return sem
+
+    async def request(self, session, url: str, headers: Optional[Dict] = None):
+        """
+        GET through host_guard with retries.
+        Returns (status, headers, body), body is None on 304.
+        """
+        async def send():
+            async with self._global_limit, self._host_limit(url):
+                async with session.get(url, headers=headers) as resp:
+                    check_status(resp.status, url)
+                    body = None if resp.status == 304 else await resp.read()
+                    return resp.status, resp.headers, body
+
+        return await host_guard.get_async(url, send, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def fetch(self, session, url: str) -> Optional[bytes]:
+        """Download raw bytes, None on error"""
+        try:
+            status, _, body = await self.request(session, url)
+            if status >= 400:
+                raise aiohttp.ClientError(f"{status} for {url}")
+            return body
+        except HostUnavailable:
+            return None
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    async def fetch_feed(self, session, rss_url: str) -> Optional[bytes]:
+        """Conditional GET, None when the feed is unchanged or unreachable"""
+        headers = feed_state.conditional_headers(rss_url)
+
+        try:
+            status, resp_headers, body = await self.request(session, rss_url, headers)
+            if status >= 400:
+                raise aiohttp.ClientError(f"{status} for {rss_url}")
+        except HostUnavailable:
+            return None
+        except Exception as e:
+            print(f"Error fetching {rss_url}: {e}")
+            return None
+
+        if not feed_state.check_feed(rss_url, status, resp_headers, body):
+            return None
+        return body
+
+    async def parse(self, fn, *args):
+        """Run a parse job on the process pool, bounded in-flight count"""
+        pool = self.parse_pool
+        async with self._parse_limit:
+            if pool.executor is None:
+                return fn(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool.executor, fn, *args)
+
+    # ==================================================
+    # TASKS
+    # ==================================================
+    async def _crawl_feed(
+        self,
+        session,
+        source: str,
+        rss_url: str,
+        category_slug: str,
+        entry_filter: Optional[EntryFilter]
+    ) -> Tuple[str, List]:
+        body = await self.fetch_feed(session, rss_url)
+        if body is None:
+            return "feed", []
+
+        entries = await self.parse(parse_feed, body)
+        if entry_filter is not None:
+            entries = [e for e in entries if entry_filter(source, rss_url, e)]
+
+        return "feed", [(source, category_slug, e) for e in entries]
+
+    async def _crawl_article(
+        self,
+        session,
+        source: str,
+        category_slug: str,
+        entry: Dict
+    ) -> Tuple[str, Optional[Dict]]:
+        html = None
+        if needs_download(source):
+            body = await self.fetch(session, entry["link"])
+            if body is not None:
+                html = body.decode("utf-8", errors="replace")
+
+        return "article", await self.parse(parse_article, source, category_slug, entry, html)
+
+    # ==================================================
+    # SCHEDULER
+    # ==================================================
+    async def stream(
+        self,
+        sources: Iterable[Tuple[str, str, str]],
+        entry_filter: Optional[EntryFilter] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield articles as they finish, feeds and pages share one task set"""
+        if self.parse_pool is None:
+            self.parse_pool = get_parse_pool()
+
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._parse_limit = asyncio.Semaphore(self.parse_pool.max_pending)
+        self._host_limits = {}
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host,
+            ttl_dns_cache=300
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=connector,
+            timeout=timeout
+        ) as session:
+            pending = {
+                asyncio.ensure_future(self._crawl_feed(session, src, url, cat, entry_filter))
+                for src, url, cat in sources
+            }
+            # Article jobs wait here so finished pages never pile up unconsumed
+            backlog = deque()
+            active = 0
+
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                    for task in done:
+                        try:
+                            kind, payload = task.result()
+                        except Exception as e:
+                            print(f"  Error in crawl task: {e}")
+                            kind, payload = "article", None
+
+                        if kind == "feed":
+                            backlog.extend(payload)
+                            continue
+
+                        active -= 1
+                        if payload:
+                            yield payload
+
+                    while backlog and active < self.max_articles:
+                        pending.add(asyncio.ensure_future(self._crawl_article(session, *backlog.popleft())))
+                        active += 1
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    async def crawl(
+        self,
+        sources: Iterable[Tuple[str, str, str]],
+        entry_filter: Optional[EntryFilter] = None
+    ) -> List[Dict]:
+        return [art async for art in self.stream(sources, entry_filter)]
+
+
+def crawl_sources(
+    sources: Iterable[Tuple[str, str, str]],
+    entry_filter: Optional[EntryFilter] = None
+) -> List[Dict]:
+    """Blocking entry point used by the bootstrap / realtime crawlers"""
+    return asyncio.run(AsyncCrawler().crawl(sources, entry_filter))
+
+
+def iter_sources(
+    sources: Iterable[Tuple[str, str, str]],
+    entry_filter: Optional[EntryFilter] = None,
+    maxsize: int = INGEST_QUEUE_SIZE
+) -> Iterator[Dict]:
+    """
+    Blocking iterator over AsyncCrawler.stream for synchronous consumers.
+    The event loop runs in its own thread and hands articles over through
+    a bounded queue, so in-flight requests keep going while the consumer
+    works, and the crawl pauses when the consumer falls behind. Closing
+    the iterator cancels the crawl.
+    """
+    articles = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+    crawl = {}
+
+    async def pump():
+        loop = asyncio.get_running_loop()
+        crawl["loop"], crawl["task"] = loop, asyncio.current_task()
+        async for art in AsyncCrawler(max_articles=maxsize).stream(sources, entry_filter):
+            if not await loop.run_in_executor(None, put_unless_stopped, articles, art, stop):
+                return
+
+    def run():
+        try:
+            asyncio.run(pump())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"  Error in async crawl: {e}")
+        finally:
+            put_unless_stopped(articles, done, stop)
+
+    threading.Thread(target=run, daemon=True).start()
+
+    try:
+        while True:
+            art = articles.get()
+            if art is done:
+                return
+            yield art
+    finally:
+        stop.set()
+        if "task" in crawl:
+            try:
+                crawl["loop"].call_soon_threadsafe(crawl["task"].cancel)
+            except RuntimeError:
+                pass  # loop already closed
@@ -0,0 +1,101 @@
+"""
+ANN index: recall@k and query speed of IVF-flat against exact search.
+
+    python benchmarks/bench_ann.py                       # 100k synthetic vectors
+    python benchmarks/bench_ann.py -n 20000 --probes 4 16
+    python benchmarks/bench_ann.py --from-db             # article embeddings in news.db
+
+Synthetic vectors are drawn around random topic centres, which is closer
+to news embeddings than uniform noise. Queries are held-out vectors.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH
+from clustering_modules.ann import BruteForceIndex, IVFFlatIndex, load_index
+
+
+def synthetic(n: int, dim: int, topics: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, n)
+    return centres[labels] + 1.2 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def from_db(limit: int) -> np.ndarray:
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute("SELECT embedding FROM news ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return np.vstack([np.frombuffer(r[0], dtype=np.float32) for r in rows])
+
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray) -> float:
+    k = exact.shape[1]
+    return float(np.mean([len(set(e) & set(a)) / k for e, a in zip(exact, approx)]))
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--vectors", type=int, default=100000)
+    parser.add_argument("-q", "--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--from-db", action="store_true", help="use embeddings stored in news.db")
+    args = parser.parse_args()
+
+    if args.from_db:
+        data = from_db(args.vectors + args.queries)
+        origin = DB_PATH
+    else:
+        data = synthetic(args.vectors + args.queries, args.dim, args.topics)
+        origin = f"synthetic, {args.topics} topics"
+
+    queries, base = data[:args.queries], data[args.queries:]
+    print(f"{len(base)} vectors x {base.shape[1]} dims ({origin}) | {len(queries)} queries | k={args.k}\n")
+
+    exact = BruteForceIndex()
+    exact.add(base)
+    truth, brute_qps = timed_search(exact, queries, args.k)
+
+    start = time.perf_counter()
+    ivf = IVFFlatIndex(n_lists=args.lists)
+    ivf.add(base)
+    build_time = time.perf_counter() - start
+    print(f"IVF build: {len(ivf.centroids)} lists in {build_time:.1f}s\n")
+
+    print(f"{'index':<14} {'recall@' + str(args.k):>10} {'queries/s':>10} {'speedup':>8}")
+    print(f"{'brute':<14} {1.0:>10.3f} {brute_qps:>10.0f} {1.0:>7.2f}x")
+    for n_probe in args.probes:
+        ivf.n_probe = n_probe
+        ids, qps = timed_search(ivf, queries, args.k)
+        print(f"{'ivf p=' + str(n_probe):<14} {recall_at_k(truth, ids):>10.3f} {qps:>10.0f} {qps / brute_qps:>7.2f}x")
+
+    # Round trip through save / load
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ivf.npz")
+        ivf.save(path)
+        loaded = load_index(path)
+        loaded.n_probe = ivf.n_probe
+        same = np.array_equal(loaded.search(queries, args.k)[1], ivf.search(queries, args.k)[1])
+    print(f"\nSave/load round trip: {'✓ identical results' if same else '✗ results differ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+News insert throughput: per-row INSERT vs db.insert_news_bulk.
+
+    python benchmarks/bench_db_insert.py                 # 1k, 10k, 100k rows
+    python benchmarks/bench_db_insert.py -n 1000 5000    # custom sizes
+
+Each run uses a fresh temporary database with the real schema and
+synthetic articles (768-dim embeddings), inserted in batches of
+--batch rows like the ingest micro-batches.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import connect, init_db, insert_news_bulk, get_category_id, clear_category_cache, vec_to_blob
+
+
+def make_rows(start: int, count: int, category_id: int, dim: int, rng):
+    vectors = rng.standard_normal((count, dim)).astype("float32")
+    return [
+        (
+            f"https://example.com/tin-{i}.html",
+            f"Tiêu đề bài viết số {i}",
+            "Nội dung bài viết. " * 100,
+            "Tóm tắt bài viết.",
+            None,
+            "VNExpress",
+            "2026-01-01 00:00:00",
+            category_id,
+            vec_to_blob(vectors[i - start])
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def per_row(connection, rows):
+    """The previous path: one execute per article, one commit per batch"""
+    for row in rows:
+        connection.execute("""
+            INSERT OR IGNORE INTO news (
+                url, title, content, summary, image_url,
+                source, published_at, category_id, embedding
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, row)
+    connection.commit()
+
+
+def bulk(connection, rows):
+    insert_news_bulk(rows, connection)
+
+
+def run(method, total: int, batch: int, dim: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = connect(os.path.join(tmp, "bench.db"))
+        init_db(connection)
+        clear_category_cache()
+        category_id = get_category_id({"name": "Thời sự", "slug": "thoi-su"}, connection)
+        connection.commit()
+
+        rng = np.random.default_rng(0)
+        elapsed = 0.0
+        for start in range(0, total, batch):
+            rows = make_rows(start, min(batch, total - start), category_id, dim, rng)
+            t0 = time.perf_counter()
+            method(connection, rows)
+            elapsed += time.perf_counter() - t0
+
+        (count,) = connection.execute("SELECT COUNT(*) FROM news").fetchone()
+        assert count == total, f"expected {total} rows, found {count}"
+        connection.close()
+
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("-b", "--batch", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    print(f"Batch: {args.batch} rows | embedding dim: {args.dim}\n")
+    print(f"{'rows':>8} {'per-row/s':>12} {'bulk/s':>12} {'speedup':>8}")
+    for total in args.sizes:
+        slow = run(per_row, total, args.batch, args.dim)
+        fast = run(bulk, total, args.batch, args.dim)
+        print(f"{total:>8} {slow:>12.0f} {fast:>12.0f} {fast / slow:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
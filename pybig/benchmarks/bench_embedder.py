@@ -0,0 +1,94 @@
+"""
+Embedding backends: parity with the torch model and throughput.
+
+    python benchmarks/bench_embedder.py                  # default model, int8 ONNX
+    python benchmarks/bench_embedder.py --fallback       # intfloat/multilingual-e5-base
+    python benchmarks/bench_embedder.py --no-quantize    # fp32 ONNX
+
+Texts come from news.db (title + content) when it has articles, else a
+small built-in sample. Exits with status 1 when the mean cosine between
+the ONNX and torch vectors is below --min-cosine.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PATH, ONNX_THREADS, ONNX_PARITY_MIN_COSINE
+from embedder import DEFAULT_MODEL, FALLBACK_MODEL, _safe_normalize
+from onnx_backend import OnnxEncoder, PARITY_TEXTS as SAMPLE_TEXTS
+
+
+def load_texts(limit: int):
+    if os.path.exists(DB_PATH):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            rows = conn.execute(
+                "SELECT title, content FROM news ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        except sqlite3.Error:
+            rows = []
+        conn.close()
+        texts = [f"{t} {c or ''}".strip() for t, c in rows]
+        if texts:
+            return texts, DB_PATH
+
+    reps = -(-limit // len(SAMPLE_TEXTS))
+    return (SAMPLE_TEXTS * reps)[:limit], "built-in sample"
+
+
+def throughput(model, texts, batch_size: int, repeat: int) -> float:
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.encode(texts, batch_size=batch_size)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fallback", action="store_true", help="benchmark the fallback model")
+    parser.add_argument("--no-quantize", action="store_true", help="use the fp32 ONNX graph")
+    parser.add_argument("-n", "--texts", type=int, default=256)
+    parser.add_argument("-b", "--batch-size", type=int, default=32)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=ONNX_THREADS)
+    parser.add_argument("--min-cosine", type=float, default=ONNX_PARITY_MIN_COSINE)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    model_name = FALLBACK_MODEL if args.fallback else DEFAULT_MODEL
+    texts, origin = load_texts(args.texts)
+    print(f"Model: {model_name} | {len(texts)} texts from {origin}\n")
+
+    torch_model = SentenceTransformer(model_name, device="cpu")
+    onnx_model = OnnxEncoder(model_name, quantize=not args.no_quantize, threads=args.threads)
+    label = "onnx-int8" if onnx_model.quantized else "onnx-fp32"
+
+    # Parity
+    ref = _safe_normalize(torch_model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True))
+    got = _safe_normalize(onnx_model.encode(texts, batch_size=args.batch_size))
+    cos = (ref * got).sum(axis=1)
+    print(f"Cosine {label} vs torch: mean={cos.mean():.5f} min={cos.min():.5f} p1={np.percentile(cos, 1):.5f}")
+
+    # Throughput
+    print(f"\n{'backend':<12} {'texts/sec':>10}")
+    torch_rate = throughput(torch_model, texts, args.batch_size, args.repeat)
+    print(f"{'torch':<12} {torch_rate:>10.1f}")
+    onnx_rate = throughput(onnx_model, texts, args.batch_size, args.repeat)
+    print(f"{label:<12} {onnx_rate:>10.1f}  ({onnx_rate / torch_rate:.2f}x)")
+
+    if cos.mean() < args.min_cosine:
+        print(f"\n✗ Parity check failed: mean cosine {cos.mean():.5f} < {args.min_cosine}")
+        sys.exit(1)
+    print(f"\n✓ Parity check passed (>= {args.min_cosine})")
+
+
+if __name__ == "__main__":
+    main()
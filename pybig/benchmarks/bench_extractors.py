@@ -0,0 +1,120 @@
+"""
+Micro-benchmark: article extraction backends on saved HTML fixtures.
+
+    python benchmarks/bench_extractors.py             # run the benchmark
+    python benchmarks/bench_extractors.py --capture   # replace fixtures with live pages
+
+The committed fixtures are trimmed pages: each publisher's article markup
+(content container, figures, sidebar, footer) around sample text, enough
+to check that every backend extracts the same text offline. Timings on
+them are lower than on real pages (~11 KB vs several hundred); capture
+live pages to measure real speed.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractors
+from config import RSS_SOURCES
+from crawler_utils import EXTRACTORS, make_soup, feed_entries, fetch_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+FIXTURE_FILES = {
+    "VNExpress": "vnexpress.html",
+    "Tuổi Trẻ": "tuoitre.html",
+    "Dân Trí": "dantri.html",
+    "Thanh Niên": "thanhnien.html",
+    "VietnamNet": "vietnamnet.html",
+}
+
+
+def capture():
+    """Download the newest article of each publisher's first feed"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    for source, filename in FIXTURE_FILES.items():
+        rss_url = next(url for src, url, _ in RSS_SOURCES if src == source)
+        # Plain GET: fetch_feed would record conditional-GET state in the database
+        body = fetch_text(rss_url)
+        entries = feed_entries(body) if body else []
+        if not entries:
+            print(f"  ✗ {source}: no entries in {rss_url}")
+            continue
+
+        html = fetch_text(entries[0]["link"])
+        if not html:
+            print(f"  ✗ {source}: could not fetch {entries[0]['link']}")
+            continue
+
+        with open(os.path.join(FIXTURES_DIR, filename), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"  ✓ {source}: {entries[0]['link']}")
+
+
+def _bs4(source, html):
+    return EXTRACTORS[source](make_soup(html))
+
+
+def run(iterations: int):
+    backends = [b for b in ("selectolax", "lxml") if extractors._resolve_backend(b)]
+    print(f"Backends: {', '.join(backends + ['bs4'])} | {iterations} iterations\n")
+
+    header = f"{'publisher':<12} {'KB':>6} " + " ".join(f"{b + ' ms':>14}" for b in backends + ["bs4"])
+    print(header)
+    print("-" * len(header))
+
+    found = False
+    mismatched = 0
+    for source, filename in FIXTURE_FILES.items():
+        path = os.path.join(FIXTURES_DIR, filename)
+        if not os.path.exists(path):
+            continue
+        found = True
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        reference = _bs4(source, html)
+        timings = []
+        mismatches = []
+
+        for backend in backends + ["bs4"]:
+            if backend == "bs4":
+                fn = lambda: _bs4(source, html)
+            else:
+                fn = lambda: extractors.extract_content(source, html, backend)
+
+            if fn() != reference:
+                mismatches.append(backend)
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            timings.append((time.perf_counter() - start) * 1000 / iterations)
+
+        row = f"{source:<12} {len(html) / 1024:>6.0f} " + " ".join(f"{t:>14.2f}" for t in timings)
+        if mismatches:
+            row += f"   (output differs: {', '.join(mismatches)})"
+        print(row)
+        mismatched += bool(mismatches)
+
+    if not found:
+        print(f"No fixtures in {FIXTURES_DIR}, run with --capture first")
+        return 1
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capture", action="store_true", help="download fresh fixtures")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.capture:
+        capture()
+    else:
+        sys.exit(run(args.iterations))
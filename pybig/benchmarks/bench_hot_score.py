@@ -0,0 +1,147 @@
+"""
+Hot score refresh: the per-cluster SQL UPDATE vs the NumPy engine.
+
+    python benchmarks/bench_hot_score.py                 # 100k clusters
+    python benchmarks/bench_hot_score.py -n 20000 --per-cluster 5
+
+A temporary database gets --clusters clusters with last updates spread
+over --days days and --per-cluster articles each. Timed:
+
+    sql      per-cluster SQL UPDATE of the score (previous path, no
+             views / reports, which the generated data does not have)
+    numpy    hot_score.update_hot_scores, first pass (every cluster scored)
+    steady   the next pass, once decayed clusters sit at 0 and are skipped
+
+Parity is the largest score difference between sql and numpy. numpy
+counts recent articles from hourly cluster_stats buckets plus, for the
+hour at the edge of the HOT_DECAY_HOURS window, from news, so the scores
+only differ by the clock moving between the two passes. Exits with
+status 1 when the difference is above --tolerance.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cluster_stats
+import hot_score
+from config import HOT_DECAY_HOURS, HOT_SCORE_FLOOR
+from db import connect, init_db
+
+
+# Score as the old scheduler wrote it, recent articles counted from news
+PREVIOUS_SQL = """
+    (CASE WHEN size = 1 THEN 0.3 WHEN size = 2 THEN 1.0 ELSE LOG(size + 1) * 2.5 END)
+    * EXP(-((julianday('now') - julianday(COALESCE(last_update, created_at))) * 24.0 / ?))
+    * (1.0 + MIN(COALESCE((
+        SELECT COUNT(*) * 0.1
+        FROM news n
+        WHERE n.cluster_id = clusters.id
+          AND (julianday('now') - julianday(n.published_at)) * 24.0 <= ?
+    ), 0), 1.0))
+"""
+
+
+def populate(connection, n_clusters: int, per_cluster: int, days: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    ages = rng.exponential(days * 86400 / 4, n_clusters).clip(0, days * 86400)
+    sizes = rng.integers(1, 2 * per_cluster, n_clusters)
+
+    def stamp(epoch):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+    connection.execute("INSERT INTO categories (name, slug) VALUES ('Thời sự', 'thoi-su')")
+    connection.executemany(
+        "INSERT INTO clusters (id, category_id, centroid, size, created_at, last_update) VALUES (?, 1, x'00', ?, ?, ?)",
+        ((i + 1, int(sizes[i]), stamp(now - ages[i] - 3600), stamp(now - ages[i])) for i in range(n_clusters))
+    )
+    connection.executemany(
+        """INSERT INTO news (url, title, published_at, category_id, cluster_id, embedding)
+           VALUES (?, 't', ?, 1, ?, x'00')""",
+        (
+            (f"https://example.com/{i}-{j}", stamp(now - ages[i] - rng.uniform(0, 6 * 3600)), i + 1)
+            for i in range(n_clusters) for j in range(per_cluster)
+        )
+    )
+    connection.commit()
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--clusters", type=int, default=100000)
+    parser.add_argument("--per-cluster", type=int, default=3)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = connect(os.path.join(tmp, "bench.db"))
+        init_db(connection)
+        populate(connection, args.clusters, args.per_cluster, args.days)
+
+        # Point the engine at the benchmark database
+        hot_score.conn = connection
+        hot_score.cursor = connection.cursor()
+        cluster_stats.cursor = hot_score.cursor
+
+        start = time.perf_counter()
+        cluster_stats.rebuild([r[0] for r in connection.execute("SELECT id FROM clusters")])
+        connection.commit()
+        backfill_time = time.perf_counter() - start
+
+        def sql_update():
+            connection.execute(
+                f"UPDATE clusters SET hot_score = {PREVIOUS_SQL}",
+                (HOT_DECAY_HOURS, HOT_DECAY_HOURS)
+            )
+            connection.commit()
+
+        sql_time = timed(sql_update)
+        reference = dict(connection.execute("SELECT id, hot_score FROM clusters"))
+
+        # Sentinel score: every cluster is a candidate and gets rewritten
+        connection.execute("UPDATE clusters SET hot_score = 1e9")
+        connection.commit()
+        numpy_time = timed(hot_score.update_hot_scores)
+        scores = dict(connection.execute("SELECT id, hot_score FROM clusters"))
+        steady_time = timed(hot_score.update_hot_scores)
+
+        (live,) = connection.execute("SELECT COUNT(*) FROM clusters WHERE hot_score > 0").fetchone()
+        connection.close()
+
+    # Below the floor the engine stores 0 on purpose; scores just above it
+    # can decay under it between the two passes
+    diffs = np.array([
+        abs(scores[cid] - ref) for cid, ref in reference.items() if ref >= 2 * HOT_SCORE_FLOOR
+    ])
+
+    print(f"{args.clusters} clusters, {args.clusters * args.per_cluster} articles, "
+          f"{live} with a score above {HOT_SCORE_FLOOR:g}\n")
+    print(f"{'path':<8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'sql':<8} {sql_time:>9.3f} {1.0:>7.2f}x")
+    print(f"{'numpy':<8} {numpy_time:>9.3f} {sql_time / numpy_time:>7.2f}x")
+    print(f"{'steady':<8} {steady_time:>9.3f} {sql_time / steady_time:>7.2f}x")
+    print(f"\nScore difference vs SQL: max {diffs.max():.2e}, "
+          f"{np.mean(diffs > 1e-6):.1%} of clusters above 1e-6")
+    print(f"cluster_stats backfill (one-off): {backfill_time:.3f}s")
+
+    if diffs.max() > args.tolerance:
+        print(f"\n✗ Parity check failed: max difference {diffs.max():.2e} > {args.tolerance:g}")
+        sys.exit(1)
+    print(f"\n✓ Parity check passed (<= {args.tolerance:g})")
+
+
+if __name__ == "__main__":
+    main()
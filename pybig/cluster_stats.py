@@ -0,0 +1,194 @@
+"""
+Per-cluster counters, so hot scores never scan news / read_logs.
+
+    cluster_stats          running totals: articles, views, reports
+    cluster_stats_hourly   the same per hour (bucket = unix time // 3600),
+                           plus member reads, kept CLUSTER_STATS_RETENTION_HOURS
+
+The pipeline adds articles as they are assigned, merges move counters,
+reclusters rebuild the affected clusters from news. Views and reads
+come from view_ingest, reports from the Next.js report route
+(bumpClusterStats in big_data/src/lib/db.js).
+Functions here do not commit, callers do.
+"""
+import time
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+from db import cursor
+from config import CLUSTER_STATS_RETENTION_HOURS
+
+
+def bucket_of(epoch: float) -> int:
+    return int(epoch) // 3600
+
+def window_start(hours: float) -> int:
+    """First bucket of the last `hours` hours"""
+    return bucket_of(time.time() - hours * 3600)
+
+def window_edge(hours: float) -> Tuple[int, float]:
+    """First bucket of the last `hours` hours and the share of it inside the window"""
+    start = time.time() - hours * 3600
+    bucket = bucket_of(start)
+    return bucket, bucket + 1 - start / 3600
+
+def _chunks(ids: List[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield chunk, ",".join("?" * len(chunk))
+
+# ==================================================
+# UPDATES
+# ==================================================
+def add_articles(news_ids: Iterable[int]):
+    """Count newly assigned articles into their clusters (run after news.cluster_id is set)"""
+    news_ids = list(news_ids)
+    first = window_start(CLUSTER_STATS_RETENTION_HOURS)
+
+    for chunk, marks in _chunks(news_ids):
+        cursor.execute(f"""
+            INSERT INTO cluster_stats (cluster_id, articles, views, reports)
+            SELECT cluster_id, COUNT(*), SUM(view_count), SUM(report_count)
+            FROM news
+            WHERE id IN ({marks})
+              AND cluster_id IS NOT NULL
+            GROUP BY cluster_id
+            ON CONFLICT(cluster_id) DO UPDATE SET
+                articles = articles + excluded.articles,
+                views = views + excluded.views,
+                reports = reports + excluded.reports,
+                updated_at = CURRENT_TIMESTAMP
+        """, chunk)
+
+        cursor.execute(f"""
+            INSERT INTO cluster_stats_hourly (cluster_id, bucket, articles)
+            SELECT cluster_id, CAST(strftime('%s', published_at) AS INTEGER) / 3600 AS b, COUNT(*)
+            FROM news
+            WHERE id IN ({marks})
+              AND cluster_id IS NOT NULL
+              AND b >= ?
+            GROUP BY cluster_id, b
+            ON CONFLICT(cluster_id, bucket) DO UPDATE SET
+                articles = articles + excluded.articles
+        """, (*chunk, first))
+
+def add_views(views: Iterable[Tuple[int, int, int, int]]):
+    """Count drained view events: (cluster_id, bucket, views, member reads)"""
+    views = list(views)
+    first = window_start(CLUSTER_STATS_RETENTION_HOURS)
+
+    totals = defaultdict(int)
+    for cluster_id, _, count, _ in views:
+        totals[cluster_id] += count
+
+    cursor.executemany("""
+        INSERT INTO cluster_stats (cluster_id, views)
+        VALUES (?, ?)
+        ON CONFLICT(cluster_id) DO UPDATE SET
+            views = views + excluded.views,
+            updated_at = CURRENT_TIMESTAMP
+    """, list(totals.items()))
+
+    cursor.executemany("""
+        INSERT INTO cluster_stats_hourly (cluster_id, bucket, views, reads)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(cluster_id, bucket) DO UPDATE SET
+            views = views + excluded.views,
+            reads = reads + excluded.reads
+    """, [row for row in views if row[1] >= first])
+
+def merge(into_id: int, from_id: int):
+    """Fold from_id's counters into into_id and drop from_id's rows"""
+    cursor.execute("""
+        INSERT INTO cluster_stats (cluster_id, articles, views, reports)
+        SELECT ?, articles, views, reports
+        FROM cluster_stats
+        WHERE cluster_id = ?
+        ON CONFLICT(cluster_id) DO UPDATE SET
+            articles = articles + excluded.articles,
+            views = views + excluded.views,
+            reports = reports + excluded.reports,
+            updated_at = CURRENT_TIMESTAMP
+    """, (into_id, from_id))
+
+    cursor.execute("""
+        INSERT INTO cluster_stats_hourly (cluster_id, bucket, articles, views, reads, reports)
+        SELECT ?, bucket, articles, views, reads, reports
+        FROM cluster_stats_hourly
+        WHERE cluster_id = ?
+        ON CONFLICT(cluster_id, bucket) DO UPDATE SET
+            articles = articles + excluded.articles,
+            views = views + excluded.views,
+            reads = reads + excluded.reads,
+            reports = reports + excluded.reports
+    """, (into_id, from_id))
+
+    cursor.execute("DELETE FROM cluster_stats WHERE cluster_id = ?", (from_id,))
+    cursor.execute("DELETE FROM cluster_stats_hourly WHERE cluster_id = ?", (from_id,))
+
+def rebuild(cluster_ids: Iterable[int]):
+    """
+    Recount clusters whose membership was rewritten (recluster). Totals
+    and recent articles come from news, recent reads from read_logs;
+    anonymous views have no timestamp, so recent views restart from the
+    member reads.
+    """
+    cluster_ids = list(cluster_ids)
+    first = window_start(CLUSTER_STATS_RETENTION_HOURS)
+    first_read = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(first * 3600))
+
+    for chunk, marks in _chunks(cluster_ids):
+        cursor.execute(f"DELETE FROM cluster_stats WHERE cluster_id IN ({marks})", chunk)
+        cursor.execute(f"DELETE FROM cluster_stats_hourly WHERE cluster_id IN ({marks})", chunk)
+
+        cursor.execute(f"""
+            INSERT INTO cluster_stats (cluster_id, articles, views, reports)
+            SELECT cluster_id, COUNT(*), SUM(view_count), SUM(report_count)
+            FROM news
+            WHERE cluster_id IN ({marks})
+            GROUP BY cluster_id
+        """, chunk)
+
+        cursor.execute(f"""
+            INSERT INTO cluster_stats_hourly (cluster_id, bucket, articles)
+            SELECT cluster_id, CAST(strftime('%s', published_at) AS INTEGER) / 3600 AS b, COUNT(*)
+            FROM news
+            WHERE cluster_id IN ({marks})
+              AND b >= ?
+            GROUP BY cluster_id, b
+        """, (*chunk, first))
+
+        cursor.execute(f"""
+            INSERT INTO cluster_stats_hourly (cluster_id, bucket, views, reads)
+            SELECT n.cluster_id, CAST(strftime('%s', rl.read_at) AS INTEGER) / 3600 AS b, COUNT(*), COUNT(*)
+            FROM read_logs rl
+            JOIN news n ON n.id = rl.news_id
+            WHERE n.cluster_id IN ({marks})
+              AND rl.read_at >= ?
+            GROUP BY n.cluster_id, b
+            ON CONFLICT(cluster_id, bucket) DO UPDATE SET
+                views = views + excluded.views,
+                reads = reads + excluded.reads
+        """, (*chunk, first_read))
+
+def rebuild_category(category_id: int):
+    cursor.execute("SELECT id FROM clusters WHERE category_id = ?", (category_id,))
+    rebuild([r[0] for r in cursor.fetchall()])
+
+def backfill() -> int:
+    """Fill the tables for a database that predates them, returns clusters counted"""
+    cursor.execute("""
+        SELECT id FROM clusters c
+        WHERE NOT EXISTS (SELECT 1 FROM cluster_stats s WHERE s.cluster_id = c.id)
+    """)
+    missing = [r[0] for r in cursor.fetchall()]
+    rebuild(missing)
+    return len(missing)
+
+def prune() -> int:
+    """Drop hourly buckets past the retention window"""
+    cursor.execute(
+        "DELETE FROM cluster_stats_hourly WHERE bucket < ?",
+        (window_start(CLUSTER_STATS_RETENTION_HOURS),)
+    )
+    return cursor.rowcount
@@ -1,16 +1,20 @@
+import time
 import numpy as np
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
 from sklearn.preprocessing import normalize
-from sklearn.neighbors import NearestNeighbors
 
 # Import optimized clustering modules
 from clustering_modules import (
     enhanced_batch_cluster_algo,
     batch_cluster_algo,
     ClusterRefiner,
-    ClusterQualityAnalyzer
+    ClusterQualityAnalyzer,
+    CategoryCentroids,
+    centroid_store,
+    AnnIndex,
+    build_index
 )
 
 from db import cursor, conn, blob_to_vec, vec_to_blob
@@ -19,21 +23,37 @@ from config import (
     MIN_SAMPLES,
     BATCH_CLUSTERING_THRESHOLD,
     K_NEIGHBORS,
-    CLUSTER_QUALITY_THRESHOLD
+    CLUSTER_QUALITY_THRESHOLD,
+    CLUSTER_ACTIVE_WINDOW_HOURS,
+    RECLUSTER_NEIGHBOR_SIM,
+    RECLUSTER_DRIFT_THRESHOLD,
+    RECLUSTER_MAX_ARTICLES,
+    RECLUSTER_CHUNK_SIZE
 )
-from hot_score import update_cluster_hot_score
+from hot_score import update_cluster_hot_score, update_cluster_hot_scores
+import cluster_stats
+import rankings
 
 # ==================================================
 # DATABASE HELPERS
 # ==================================================
-def create_cluster(category_id: int, centroid: np.ndarray, size: int) -> int:
-    """Create a new cluster in database"""
+def create_cluster(
+    category_id: int,
+    centroid: np.ndarray,
+    size: int,
+    refresh_hot_score: bool = True,
+    recluster_tag: Optional[str] = None
+) -> int:
+    """Create a new cluster in database (tagged clusters are a recluster's shadow copy)"""
     cursor.execute("""
-        INSERT INTO clusters (category_id, centroid, size)
-        VALUES (?, ?, ?)
-    """, (category_id, vec_to_blob(centroid), size))
+        INSERT INTO clusters (category_id, centroid, size, recluster_tag)
+        VALUES (?, ?, ?, ?)
+    """, (category_id, vec_to_blob(centroid), size, recluster_tag))
     cid = cursor.lastrowid
-    update_cluster_hot_score(cid)
+    if recluster_tag is None:
+        centroid_store.on_create(category_id, cid, centroid, size)
+    if refresh_hot_score:
+        update_cluster_hot_score(cid)
     return cid
 
 def update_cluster(cluster_id: int, centroid: np.ndarray, size: int):
@@ -43,15 +63,31 @@ def update_cluster(cluster_id: int, centroid: np.ndarray, size: int):
         SET centroid = ?, size = ?, last_update = CURRENT_TIMESTAMP
         WHERE id = ?
     """, (vec_to_blob(centroid), size, cluster_id))
+    centroid_store.on_update(cluster_id, centroid, size)
     update_cluster_hot_score(cluster_id)
 
-def load_clusters(category_id: int) -> List[Dict]:
-    """Load clusters from database"""
-    cursor.execute("""
-        SELECT id, centroid, size, created_at
-        FROM clusters
-        WHERE category_id = ?
-    """, (category_id,))
+def mark_clusters_dirty(category_id: int, cluster_ids: List[int], reason: str):
+    """Queue clusters for the next incremental recluster (first reason wins, no commit)"""
+    cursor.executemany("""
+        INSERT OR IGNORE INTO cluster_dirty (cluster_id, category_id, reason)
+        VALUES (?, ?, ?)
+    """, [(int(cid), category_id, reason) for cid in cluster_ids])
+
+def load_clusters(category_id: int, active_only: bool = False) -> List[Dict]:
+    """Load clusters from database (active_only: created within the active window)"""
+    if active_only:
+        cursor.execute("""
+            SELECT id, centroid, size, created_at
+            FROM clusters
+            WHERE category_id = ?
+              AND created_at >= datetime('now', ?)
+        """, (category_id, f"-{CLUSTER_ACTIVE_WINDOW_HOURS} hours"))
+    else:
+        cursor.execute("""
+            SELECT id, centroid, size, created_at
+            FROM clusters
+            WHERE category_id = ?
+        """, (category_id,))
 
     clusters = []
     for cid, centroid, size, created_at in cursor.fetchall():
@@ -63,52 +99,92 @@ def load_clusters(category_id: int) -> List[Dict]:
         })
     return clusters
 
-def build_knn_index(clusters: List[Dict]) -> Optional[NearestNeighbors]:
-    """Build KNN index for clusters"""
+def build_knn_index(clusters: List[Dict]) -> Optional[AnnIndex]:
+    """Build KNN index for clusters (ids are positions in clusters)"""
     if not clusters:
         return None
 
     X = np.array([c["centroid"] for c in clusters])
-
-    knn = NearestNeighbors(
-        n_neighbors=min(K_NEIGHBORS, len(clusters)),
-        metric="cosine",
-        algorithm="brute"
-    )
-    knn.fit(X)
-    return knn
+    return build_index(X)
 
 def assign_cluster(
     vec: np.ndarray,
     clusters: List[Dict],
-    knn: NearestNeighbors
+    knn: AnnIndex
 ) -> Optional[Dict]:
     """Assign vector to nearest cluster"""
     if knn is None:
         return None
 
     vec = normalize(vec.reshape(1, -1))[0]
-    distances, indices = knn.kneighbors([vec])
-    sims = 1.0 - distances[0]
+    sims, indices = knn.search(vec, min(K_NEIGHBORS, len(clusters)))
 
     now = datetime.utcnow()
     best = None
     best_sim = 0.0
 
-    for i, idx in enumerate(indices[0]):
+    for sim, idx in zip(sims[0], indices[0]):
+        if idx < 0:
+            continue
         c = clusters[idx]
 
         # Prevent drift
-        if now - c["created_at"] > timedelta(hours=48):
+        if now - c["created_at"] > timedelta(hours=CLUSTER_ACTIVE_WINDOW_HOURS):
             continue
 
-        sim = sims[i]
         if sim >= SIM_THRESHOLD and sim > best_sim:
             best = c
             best_sim = sim
 
     return best
 
+def assign_batch(vectors: np.ndarray, store: CategoryCentroids) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign a batch of normalized vectors in one pass.
+
+    The category's ANN index (active clusters only) returns the
+    K_NEIGHBORS nearest centroids of every vector in one call; the best
+    one above SIM_THRESHOLD wins. Articles that match nothing seed new
+    clusters, and later articles of the same batch may join those seeds,
+    in input order.
+
+    Returns (targets, seeds): targets[i] is a row of the store or -1,
+    seeds[i] is the batch index of the article seeding i's new cluster or -1.
+    """
+    n = len(vectors)
+    targets = np.full(n, -1, dtype=int)
+    seeds = np.full(n, -1, dtype=int)
+    best_sim = np.full(n, -np.inf)
+
+    if len(store):
+        sims, ids = store.ann_index().search(vectors, min(K_NEIGHBORS, len(store)))
+        rows = np.vectorize(lambda cid: store.row_of.get(int(cid), -1), otypes=[int])(ids)
+        sims = np.where(rows >= 0, sims, -np.inf)
+
+        best = sims.argmax(axis=1)
+        sim = sims[np.arange(n), best]
+        hit = sim >= SIM_THRESHOLD
+        targets[hit] = rows[np.arange(n), best][hit]
+        best_sim[hit] = sim[hit]
+
+    # Leaders of the new clusters seeded so far in this batch
+    pair_sims = vectors @ vectors.T
+    leaders = []
+    for i in range(n):
+        if leaders:
+            sims = pair_sims[i, leaders]
+            j = int(sims.argmax())
+            if sims[j] >= SIM_THRESHOLD and sims[j] > best_sim[i]:
+                targets[i] = -1
+                seeds[i] = leaders[j]
+                continue
+
+        if targets[i] < 0:
+            leaders.append(i)
+            seeds[i] = i
+
+    return targets, seeds
+
 # ==================================================
 # BATCH CLUSTERING
 # ==================================================
@@ -150,87 +226,86 @@ def batch_cluster_articles(
 # ==================================================
 # ENHANCED HYBRID CLUSTERING
 # ==================================================
-def enhanced_hybrid_cluster_articles(
-    articles: List[Dict],
-    category_id: int,
-    enable_refinement: bool = True
-):
-    """Enhanced hybrid clustering - OPTIMIZED"""
+def enhanced_hybrid_cluster_articles(articles: List[Dict], category_id: int):
+    """Enhanced hybrid clustering - batched assignment, one DB write per batch"""
     if not articles:
         return
     
     print(f"⚡ Clustering {len(articles)} articles in category {category_id}")
     
-    # Batch clustering for large datasets
-    if len(articles) >= BATCH_CLUSTERING_THRESHOLD:
-        print(f"  Using batch clustering...")
-    
-    clusters = load_clusters(category_id)
-    knn = build_knn_index(clusters)
-    
-    # Group articles by similarity for batch updates
-    article_groups = defaultdict(list)
-    
-    for art in articles:
-        vec = normalize(art["embedding"].reshape(1, -1))[0]
-        cluster = assign_cluster(vec, clusters, knn)
-        
-        if cluster:
-            article_groups[cluster["id"]].append((art["id"], vec))
-        else:
-            # New cluster
-            cid = create_cluster(category_id, vec, 1)
-            clusters.append({
-                "id": cid,
-                "centroid": vec,
-                "size": 1,
-                "created_at": datetime.utcnow()
-            })
-            knn = build_knn_index(clusters)
-            cursor.execute(
-                "UPDATE news SET cluster_id=? WHERE id=?",
-                (cid, art["id"])
-            )
-    
-    # Batch update clusters
-    for cluster_id, items in article_groups.items():
-        if not items:
-            continue
-            
-        cluster = next((c for c in clusters if c["id"] == cluster_id), None)
-        if not cluster:
-            continue
-            
-        # Update centroid with all new points at once
-        size = cluster["size"]
-        centroid = cluster["centroid"]
-        
-        # Weighted update
-        new_vecs = np.array([vec for _, vec in items])
-        avg_new_vec = normalize(np.mean(new_vecs, axis=0).reshape(1, -1))[0]
-        
-        # Exponential moving average for stability
-        alpha = 0.7
-        new_centroid = normalize(
-            (alpha * centroid + (1 - alpha) * avg_new_vec).reshape(1, -1)
-        )[0]
-        
-        # Update cluster
-        new_size = size + len(items)
-        update_cluster(cluster_id, new_centroid, new_size)
-        
-        # Update cluster in local list
-        cluster["centroid"] = new_centroid
-        cluster["size"] = new_size
-        
-        # Update articles
-        for article_id, _ in items:
-            cursor.execute(
-                "UPDATE news SET cluster_id=? WHERE id=?",
-                (cluster_id, article_id)
-            )
-    
-    conn.commit()
+    store = centroid_store.get(category_id)
+    archived = store.expire(time.time() - CLUSTER_ACTIVE_WINDOW_HOURS * 3600)
+    if archived:
+        print(f"  {archived} clusters left the active window")
+    vectors = normalize(np.vstack([a["embedding"] for a in articles])).astype(np.float32)
+    targets, seeds = assign_batch(vectors, store)
+
+    news_updates = []
+    touched = []
+    drifted = []
+    created = []
+
+    try:
+        # Existing clusters: all new points folded in at once
+        cluster_updates = []
+        for row in np.unique(targets[targets >= 0]):
+            members = np.where(targets == row)[0]
+            cluster_id = int(store.ids[row])
+
+            avg_new_vec = normalize(np.mean(vectors[members], axis=0).reshape(1, -1))[0]
+
+            # Exponential moving average for stability
+            alpha = 0.7
+            new_centroid = normalize(
+                (alpha * store.centroids[row] + (1 - alpha) * avg_new_vec).reshape(1, -1)
+            )[0]
+            new_size = int(store.sizes[row]) + len(members)
+
+            if 1.0 - float(np.dot(store.centroids[row], new_centroid)) >= RECLUSTER_DRIFT_THRESHOLD:
+                drifted.append(cluster_id)
+
+            cluster_updates.append((vec_to_blob(new_centroid), new_size, cluster_id))
+            store.update(cluster_id, new_centroid, new_size)
+
+            touched.append(cluster_id)
+            news_updates.extend((cluster_id, articles[i]["id"]) for i in members)
+
+        # New clusters seeded in this batch (appended to the store)
+        for leader in np.unique(seeds[seeds >= 0]):
+            members = np.where(seeds == leader)[0]
+            centroid = normalize(np.mean(vectors[members], axis=0).reshape(1, -1))[0]
+
+            cid = create_cluster(category_id, centroid, len(members), refresh_hot_score=False)
+            touched.append(cid)
+            created.append(cid)
+            news_updates.extend((cid, articles[i]["id"]) for i in members)
+
+        cursor.executemany("""
+            UPDATE clusters
+            SET centroid = ?, size = ?, last_update = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, cluster_updates)
+
+        cursor.executemany(
+            "UPDATE news SET cluster_id=? WHERE id=?",
+            news_updates
+        )
+
+        cluster_stats.add_articles(nid for _, nid in news_updates)
+        rankings.refresh_representatives(touched)
+        update_cluster_hot_scores(touched)
+
+        mark_clusters_dirty(category_id, drifted, "drift")
+        mark_clusters_dirty(category_id, [c for _, _, c in cluster_updates], "members")
+        mark_clusters_dirty(category_id, created, "new")
+        conn.commit()
+    except Exception:
+        # The in-memory rows may be ahead of the database now
+        conn.rollback()
+        centroid_store.invalidate(category_id)
+        raise
+
+    print(f"  ✓ {len(cluster_updates)} clusters updated, {len(touched) - len(cluster_updates)} created")
 
 # ==================================================
 # CLUSTER REFINEMENT
@@ -295,19 +370,10 @@ def perform_cluster_refinement(category_id: int):
         if cohesion.get(0, 0) < CLUSTER_QUALITY_THRESHOLD:
             print(f"  Cluster {cluster_id} has low cohesion: {cohesion[0]:.3f}")
             
-            # Try to split if large enough
-            if len(articles) >= 10:
-                # Run sub-clustering
-                sub_labels, _ = enhanced_batch_cluster_algo(
-                    embeddings, 
-                    [a['title'] + ' ' + a.get('summary', '') for a in articles]
-                )
-                
-                if len(set(sub_labels)) > 1:
-                    print(f"  Splitting cluster {cluster_id}...")
-                    refiner.split_heterogeneous_cluster(
-                        cluster_id, embeddings, sub_labels
-                    )
+            # Split by the next incremental recluster of its neighbourhood
+            mark_clusters_dirty(category_id, [cluster_id], "cohesion")
+    
+    conn.commit()
     
     # Find merge candidates
     all_clusters = list(clusters_info.values())
@@ -319,165 +385,400 @@ def perform_cluster_refinement(category_id: int):
             refiner.merge_clusters(cid1, cid2)
 
 # ==================================================
-# ENHANCED RECLUSTERING
+# INCREMENTAL RECLUSTERING
 # ==================================================
-def recluster_category_safe(
-    category_id: int,
-    full_optimization: bool = True
-) -> Dict[str, Any]:
+def _in_chunks(ids: List[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield chunk, ",".join("?" * len(chunk))
+
+def dirty_neighbourhood(category_id: int, dirty: List[int]) -> List[int]:
+    """Dirty clusters plus their active neighbours above RECLUSTER_NEIGHBOR_SIM"""
+    region = set(dirty)
+    store = centroid_store.get(category_id)
+    rows = [store.row_of[cid] for cid in dirty if cid in store]
+
+    if rows:
+        sims, ids = store.ann_index().search(store.centroids[rows], min(K_NEIGHBORS, len(store)))
+        region.update(int(cid) for cid in ids[sims >= RECLUSTER_NEIGHBOR_SIM] if cid >= 0)
+    return sorted(region)
+
+def match_labels(labels: np.ndarray, old_ids: np.ndarray) -> Dict[int, int]:
+    """
+    Map new labels to old cluster ids by member overlap, largest overlap
+    first, each old id used at most once. Unmatched labels are missing.
+    """
+    overlap = Counter(
+        (int(label), int(cid)) for label, cid in zip(labels, old_ids) if label != -1
+    )
+    matched, used = {}, set()
+    for (label, cid), _ in sorted(overlap.items(), key=lambda kv: (-kv[1], kv[0])):
+        if label in matched or cid in used:
+            continue
+        matched[label] = cid
+        used.add(cid)
+    return matched
+
+def incremental_recluster_category(category_id: int) -> Dict[str, Any]:
+    """
+    Re-cluster only the neighbourhoods of dirty clusters.
+
+    New labels inherit the id of the old cluster they overlap most, noise
+    points stay where they were, clusters left empty are deleted. Clusters
+    outside the neighbourhoods keep their ids and members.
+    """
+    cursor.execute("""
+        SELECT d.cluster_id
+        FROM cluster_dirty d
+        JOIN clusters c ON c.id = d.cluster_id
+        WHERE d.category_id = ?
+    """, (category_id,))
+    dirty = [r[0] for r in cursor.fetchall()]
+
+    result = {
+        "status": "clean",
+        "mode": "incremental",
+        "dirty": len(dirty),
+        "region": 0,
+        "articles": 0,
+        "clusters_created": 0,
+        "clusters_removed": 0
+    }
+    if not dirty:
+        cursor.execute("DELETE FROM cluster_dirty WHERE category_id = ?", (category_id,))
+        conn.commit()
+        return result
 
-    print(f"⚡ Reclustering category {category_id} (safe mode)")
+    print(f"⚡ Reclustering category {category_id} (incremental, {len(dirty)} dirty clusters)")
 
+    region = dirty_neighbourhood(category_id, dirty)
+    result["region"] = len(region)
+
+    rows = []
+    for chunk, marks in _in_chunks(region):
+        cursor.execute(f"""
+            SELECT id, cluster_id, embedding, title, summary
+            FROM news
+            WHERE cluster_id IN ({marks})
+              AND embedding IS NOT NULL
+        """, chunk)
+        rows.extend(cursor.fetchall())
+
+    try:
+        if len(rows) >= 2:
+            _recluster_region(category_id, region, rows, result)
+            result["status"] = "success"
+
+        for chunk, marks in _in_chunks(region):
+            cursor.execute(f"DELETE FROM cluster_dirty WHERE cluster_id IN ({marks})", chunk)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        centroid_store.invalidate(category_id)
+
+    result["articles"] = len(rows)
+    print(
+        f"  ✓ {len(region)} clusters / {len(rows)} articles re-clustered: "
+        f"{result['clusters_created']} created, {result['clusters_removed']} removed"
+    )
+    return result
+
+def _recluster_region(category_id: int, region: List[int], rows: List[Tuple], result: Dict[str, Any]):
+    """Cluster the region's articles and write the id-stable result (no commit)"""
+    news_ids = np.array([r[0] for r in rows])
+    old_ids = np.array([r[1] for r in rows])
+    embeddings = np.vstack([blob_to_vec(r[2]) for r in rows])
+    texts = [f"{r[3] or ''}. {r[4] or ''}" for r in rows]
+
+    labels, _ = enhanced_batch_cluster_algo(embeddings, texts, category_id)
+    matched = match_labels(labels, old_ids)
+
+    created_at = {}
+    for chunk, marks in _in_chunks(region):
+        cursor.execute(f"SELECT id, created_at FROM clusters WHERE id IN ({marks})", chunk)
+        created_at.update(cursor.fetchall())
+
+    # Noise keeps its old cluster, unmatched labels become new clusters
+    final_ids = old_ids.copy()
+    for label in set(labels) - {-1}:
+        members = labels == label
+        if label in matched:
+            final_ids[members] = matched[label]
+        else:
+            centroid = normalize(np.mean(embeddings[members], axis=0).reshape(1, -1))[0]
+            cid = create_cluster(category_id, centroid, int(members.sum()), refresh_hot_score=False)
+            final_ids[members] = cid
+
+            # A split keeps the age of its source, so it does not re-enter the active window
+            cursor.execute(
+                "UPDATE clusters SET created_at = ? WHERE id = ?",
+                (min(created_at[int(c)] for c in np.unique(old_ids[members])), cid)
+            )
+            result["clusters_created"] += 1
+
+    cluster_updates = []
+    for cid in np.unique(final_ids):
+        members = final_ids == cid
+        centroid = normalize(np.mean(embeddings[members], axis=0).reshape(1, -1))[0]
+        cluster_updates.append((vec_to_blob(centroid), int(members.sum()), int(cid)))
+
+    cursor.executemany("""
+        UPDATE clusters
+        SET centroid = ?, size = ?, last_update = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, cluster_updates)
+
+    moved = final_ids != old_ids
+    cursor.executemany(
+        "UPDATE news SET cluster_id=? WHERE id=?",
+        [(int(cid), int(nid)) for cid, nid in zip(final_ids[moved], news_ids[moved])]
+    )
+
+    emptied = sorted(set(region) - set(int(c) for c in final_ids))
+    for chunk, marks in _in_chunks(emptied):
+        cursor.execute(f"DELETE FROM clusters WHERE id IN ({marks})", chunk)
+    result["clusters_removed"] = len(emptied)
+
+    cluster_stats.rebuild([c for _, _, c in cluster_updates] + emptied)
+    rankings.refresh_representatives([c for _, _, c in cluster_updates])
+    update_cluster_hot_scores([c for _, _, c in cluster_updates])
+
+# ==================================================
+# ENHANCED RECLUSTERING
+# ==================================================
+def safe_vec(vec: np.ndarray, dim: Optional[int] = None) -> Optional[np.ndarray]:
+    """Unit float32 vector, None if empty, non-finite, zero or of another dimension"""
+    vec = np.asarray(vec, dtype=np.float32)
+    if vec.ndim != 1 or not len(vec) or (dim is not None and len(vec) != dim):
+        return None
+    if not np.all(np.isfinite(vec)):
+        return None
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else None
+
+def load_recluster_chunks(category_id: int) -> Iterator[Tuple[np.ndarray, np.ndarray, List[str]]]:
+    """Newest RECLUSTER_MAX_ARTICLES valid articles as (ids, embeddings, texts), RECLUSTER_CHUNK_SIZE at a time"""
     cursor.execute("""
-        SELECT id, embedding, title, summary, published_at
+        SELECT id
         FROM news
         WHERE category_id = ?
           AND embedding IS NOT NULL
         ORDER BY published_at DESC
-        LIMIT 10000
-    """, (category_id,))
-
-    rows = cursor.fetchall()
-    if not rows:
-        return {"status": "no_articles", "clusters_created": 0}
-
-    # ─────────────────────────────
-    # 1️⃣ Load & validate articles
-    # ─────────────────────────────
-    articles = []
-    for r in rows:
-        nid, emb_blob, title, summary, published_at = r
-        vec = safe_vec(blob_to_vec(emb_blob))
-        if vec is None:
+        LIMIT ?
+    """, (category_id, RECLUSTER_MAX_ARTICLES))
+    news_ids = [r[0] for r in cursor.fetchall()]
+    dim = None
+
+    for start in range(0, len(news_ids), RECLUSTER_CHUNK_SIZE):
+        ids, vecs, texts = [], [], []
+        for chunk_ids, marks in _in_chunks(news_ids[start:start + RECLUSTER_CHUNK_SIZE]):
+            cursor.execute(f"""
+                SELECT id, embedding, title, summary
+                FROM news
+                WHERE id IN ({marks})
+            """, chunk_ids)
+            for nid, emb_blob, title, summary in cursor.fetchall():
+                vec = safe_vec(blob_to_vec(emb_blob), dim)
+                if vec is None:
+                    continue
+                dim = len(vec)
+                ids.append(nid)
+                vecs.append(vec)
+                texts.append(f"{title or ''}. {summary or ''}")
+
+        if ids:
+            yield np.array(ids), np.vstack(vecs), texts
+
+def merge_chunk_groups(groups: List[Dict], chunk_groups: List[Dict]) -> int:
+    """
+    Fold one chunk's groups into the groups of earlier chunks: a group whose
+    centroid is within SIM_THRESHOLD of an earlier group joins the closest
+    one (size-weighted centroid), so a story straddling a chunk boundary
+    stays one cluster. The rest are appended. Returns groups merged.
+    """
+    if not groups or not chunk_groups:
+        groups.extend(chunk_groups)
+        return 0
+
+    sims = np.vstack([g["centroid"] for g in chunk_groups]) @ np.vstack([g["centroid"] for g in groups]).T
+    merged = 0
+
+    for group, row in zip(chunk_groups, sims):
+        best = int(np.argmax(row))
+        if row[best] < SIM_THRESHOLD:
+            groups.append(group)
             continue
 
-        articles.append({
-            "id": nid,
-            "embedding": vec,
-            "text": f"{title or ''}. {summary or ''}",
-            "published_at": published_at
-        })
+        target = groups[best]
+        n_old, n_new = len(target["members"]), len(group["members"])
+        target["centroid"] = normalize(
+            (target["centroid"] * n_old + group["centroid"] * n_new).reshape(1, -1)
+        )[0]
+        target["members"].extend(group["members"])
+        merged += 1
 
-    if not articles:
-        return {"status": "no_valid_embeddings", "clusters_created": 0}
+    return merged
 
-    print(f"  ✓ Valid articles: {len(articles)}")
+def cluster_chunks(
+    category_id: int,
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray, List[str]]]
+) -> Tuple[List[Dict], int]:
+    """
+    Cluster (ids, embeddings, texts) chunks one by one, merging each
+    chunk's groups into those of earlier chunks (merge_chunk_groups), then
+    attach the noise to the nearest new centroid (or a singleton). Only one
+    chunk of embeddings is held at a time, plus the noise vectors. No
+    database access.
+
+    Returns (groups, n_articles), each group {"centroid", "members": news ids}.
+    """
+    groups = []
+    noise_ids, noise_vecs = [], []
+    n_valid = 0
+    merged = 0
+
+    for n, (ids, embeddings, texts) in enumerate(chunks, 1):
+        print(f"  ▶ Chunk {n}")
+        n_valid += len(ids)
+
+        if len(ids) >= 2:
+            labels, _ = enhanced_batch_cluster_algo(embeddings, texts, category_id)
+        else:
+            labels = np.full(len(ids), -1)
 
-    recluster_tag = f"re_{category_id}_{int(time.time())}"
+        chunk_groups = [
+            {
+                "centroid": normalize(np.mean(embeddings[labels == label], axis=0).reshape(1, -1))[0],
+                "members": ids[labels == label].tolist()
+            }
+            for label in sorted(set(labels) - {-1})
+        ]
+        merged += merge_chunk_groups(groups, chunk_groups)
 
-    cursor.execute("""
-        ALTER TABLE clusters ADD COLUMN recluster_tag TEXT
-    """)  # ignore if exists
-    conn.commit()
+        noise = labels == -1
+        noise_ids.extend(ids[noise].tolist())
+        noise_vecs.extend(np.asarray(embeddings[noise], dtype=np.float32))
 
-    cluster_map = {}
-    total_clusters = 0
+    if merged:
+        print(f"  ▶ Merged {merged} groups across chunk boundaries")
 
-    for i in range(0, len(articles), CHUNK_SIZE):
-        chunk = articles[i:i + CHUNK_SIZE]
-        print(f"  ▶ Chunk {i//CHUNK_SIZE + 1}")
+    if noise_ids:
+        print(f"  ▶ Assigning {len(noise_ids)} noise points")
+        noise_vecs = np.vstack(noise_vecs)
+        nearest = np.full(len(noise_ids), -1)
 
-        embeddings = np.vstack([a["embedding"] for a in chunk])
-        texts = [a["text"] for a in chunk]
+        if groups:
+            sims, idx = build_index(np.vstack([g["centroid"] for g in groups])).search(noise_vecs, 1)
+            hit = sims[:, 0] >= SIM_THRESHOLD
+            nearest[hit] = idx[hit, 0]
 
-        labels, _ = enhanced_batch_cluster_algo(
-            embeddings, texts, category_id
-        )
+        for nid, vec, g in zip(noise_ids, noise_vecs, nearest):
+            if g >= 0:
+                groups[g]["members"].append(nid)
+            else:
+                groups.append({"centroid": vec, "members": [nid]})
 
-        for label in set(labels):
-            if label == -1:
-                continue
+    return groups, n_valid
 
-            idxs = np.where(labels == label)[0]
-            vecs = embeddings[idxs]
+def apply_recluster(
+    category_id: int,
+    groups: List[Dict],
+    n_articles: int,
+    full_optimization: bool = True
+) -> Dict[str, Any]:
+    """
+    Swap a category's clusters for the groups from cluster_chunks.
+
+    The new clusters are inserted under a recluster_tag, articles moved
+    onto them, old clusters left empty deleted and the tag cleared, all in
+    one transaction: other connections see either the old or the new
+    clusters. Old clusters still holding older articles are kept with
+    their size refreshed.
+    """
+    if not groups:
+        return {"status": "no_articles", "articles": 0, "clusters_created": 0}
 
-            centroid = normalize(
-                np.mean(vecs, axis=0).reshape(1, -1)
-            )[0]
+    recluster_tag = f"re_{category_id}_{int(time.time())}"
 
+    try:
+        new_ids = []
+        news_updates = []
+        for g in groups:
             cid = create_cluster(
                 category_id,
-                centroid,
-                size=len(idxs),
+                g["centroid"],
+                len(g["members"]),
+                refresh_hot_score=False,
                 recluster_tag=recluster_tag
             )
-            total_clusters += 1
-
-            for idx in idxs:
-                aid = chunk[idx]["id"]
-                cluster_map[aid] = cid
-                cursor.execute(
-                    "UPDATE news SET cluster_id=? WHERE id=?",
-                    (cid, aid)
-                )
-
-        conn.commit()
-
-    # ─────────────────────────────
-    # 4️⃣ Handle noise (KNN assign)
-    # ─────────────────────────────
-    noise = [a for a in articles if a["id"] not in cluster_map]
-
-    if noise:
-        print(f"  ▶ Assigning {len(noise)} noise points")
+            new_ids.append(cid)
+            news_updates.extend((cid, nid) for nid in g["members"])
 
-        clusters = load_clusters(category_id)
-        knn = build_knn_index(clusters) if clusters else None
+        cursor.executemany("UPDATE news SET cluster_id=? WHERE id=?", news_updates)
 
-        for a in noise:
-            vec = normalize(a["embedding"].reshape(1, -1))[0]
-            cluster = assign_cluster(vec, clusters, knn)
+        # ─────────────────────────────
+        # Swap: drop old clusters left empty, keep the rest
+        # ─────────────────────────────
+        cursor.execute("""
+            DELETE FROM clusters
+            WHERE category_id = ?
+              AND recluster_tag IS NULL
+              AND NOT EXISTS (SELECT 1 FROM news n WHERE n.cluster_id = clusters.id)
+        """, (category_id,))
+        removed = cursor.rowcount
 
-            if cluster:
-                cid = cluster["id"]
-                cursor.execute("""
-                    UPDATE clusters
-                    SET size = size + 1,
-                        last_update = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (cid,))
-            else:
-                cid = create_cluster(
-                    category_id, vec, 1, recluster_tag=recluster_tag
-                )
-                total_clusters += 1
+        cursor.execute("""
+            UPDATE clusters
+            SET size = (SELECT COUNT(*) FROM news n WHERE n.cluster_id = clusters.id)
+            WHERE category_id = ?
+              AND recluster_tag IS NULL
+        """, (category_id,))
 
-            cursor.execute(
-                "UPDATE news SET cluster_id=? WHERE id=?",
-                (cid, a["id"])
-            )
+        cursor.execute("""
+            UPDATE clusters
+            SET recluster_tag = NULL
+            WHERE category_id = ?
+              AND recluster_tag = ?
+        """, (category_id, recluster_tag))
 
+        cursor.execute("DELETE FROM cluster_dirty WHERE category_id = ?", (category_id,))
+        cluster_stats.rebuild_category(category_id)
+        rankings.refresh_category_representatives(category_id)
+        update_cluster_hot_scores(new_ids)
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        centroid_store.invalidate(category_id)
 
-    # ─────────────────────────────
-    # 5️⃣ Swap old clusters safely
-    # ─────────────────────────────
-    cursor.execute("""
-        DELETE FROM clusters
-        WHERE category_id = ?
-          AND recluster_tag IS NULL
-    """, (category_id,))
-
-    cursor.execute("""
-        UPDATE clusters
-        SET recluster_tag = NULL
-        WHERE recluster_tag = ?
-    """, (recluster_tag,))
-
-    conn.commit()
+    print(f"  ✓ Swapped in {len(new_ids)} clusters, removed {removed} old clusters")
 
-    # ─────────────────────────────
-    # 6️⃣ Optional refinement
-    # ─────────────────────────────
     if full_optimization:
         perform_cluster_refinement(category_id)
 
     return {
         "status": "success",
-        "articles": len(articles),
-        "clusters_created": total_clusters
+        "articles": n_articles,
+        "clusters_created": len(new_ids),
+        "clusters_removed": removed
     }
 
+def recluster_category_safe(
+    category_id: int,
+    full_optimization: bool = True
+) -> Dict[str, Any]:
+    """Shadow recluster of the newest RECLUSTER_MAX_ARTICLES articles, chunked, swapped in atomically"""
+    print(f"⚡ Reclustering category {category_id} (safe mode)")
+
+    groups, n_articles = cluster_chunks(category_id, load_recluster_chunks(category_id))
+    if n_articles:
+        print(f"  ✓ Valid articles: {n_articles}")
+
+    return apply_recluster(category_id, groups, n_articles, full_optimization)
+
 # ==================================================
 # MAIN ENTRY POINTS
 # ==================================================
@@ -488,7 +789,7 @@ def hybrid_cluster_articles(
 ):
     """Main clustering function - OPTIMIZED"""
     if use_enhanced:
-        return enhanced_hybrid_cluster_articles(articles, category_id, enable_refinement=True)
+        return enhanced_hybrid_cluster_articles(articles, category_id)
     else:
         # Original implementation for backward compatibility
         if not articles:
@@ -508,10 +809,12 @@ def hybrid_cluster_articles(
                     (cid, art["id"])
                 )
             
+            cluster_stats.add_articles(a["id"] for a in articles)
+            rankings.refresh_representatives_of_news(a["id"] for a in articles)
             conn.commit()
             return
         
-        clusters = load_clusters(category_id)
+        clusters = load_clusters(category_id, active_only=True)
         knn = build_knn_index(clusters)
         
         for art in articles:
@@ -546,12 +849,14 @@ def hybrid_cluster_articles(
                 (cid_to_use, art["id"])
             )
         
+        cluster_stats.add_articles(a["id"] for a in articles)
+        rankings.refresh_representatives_of_news(a["id"] for a in articles)
         conn.commit()
 
 def recluster_category(category_id: int, enhanced: bool = True) -> Dict[str, Any]:
     """Recluster category - OPTIMIZED"""
     if enhanced:
-        return enhanced_recluster_category(category_id, full_optimization=True)
+        return recluster_category_safe(category_id, full_optimization=True)
     else:
         # Original implementation
         cursor.execute("""
@@ -591,7 +896,10 @@ def recluster_category(category_id: int, enhanced: bool = True) -> Dict[str, Any
                 (cid, aid)
             )
         
+        cluster_stats.rebuild_category(category_id)
+        rankings.refresh_category_representatives(category_id)
         conn.commit()
+        centroid_store.invalidate(category_id)
         
         return {
             "clusters_created": len(set(cluster_map.values())),
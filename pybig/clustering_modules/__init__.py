@@ -8,6 +8,8 @@ from .embeddings import EmbeddingEnhancer
 from .refiner import ClusterRefiner
 from .quality import ClusterQualityAnalyzer, DynamicParameterTuner
 from .algorithms import enhanced_batch_cluster_algo, batch_cluster_algo
+from .ann import AnnIndex, BruteForceIndex, IVFFlatIndex, build_index, load_index
+from .centroid_store import CentroidStore, CategoryCentroids, centroid_store
 
 __all__ = [
     'TextFeatureExtractor',
@@ -20,4 +22,12 @@ __all__ = [
     'DynamicParameterTuner',
     'enhanced_batch_cluster_algo',
     'batch_cluster_algo',
+    'AnnIndex',
+    'BruteForceIndex',
+    'IVFFlatIndex',
+    'build_index',
+    'load_index',
+    'CentroidStore',
+    'CategoryCentroids',
+    'centroid_store',
 ]
@@ -178,7 +178,7 @@ def _merge_small_clusters(
     cluster_sizes = Counter(labels)
     small_clusters = {
         c for c, s in cluster_sizes.items()
-        if 0 < s < min_samples
+        if c != -1 and 0 < s < min_samples
     }
 
     if not small_clusters:
@@ -0,0 +1,354 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import ANN_INDEX, ANN_MIN_ITEMS, ANN_IVF_LISTS, ANN_IVF_NPROBE
+
+# Queries per matrix product, bounds the (queries x vectors) block in memory
+_QUERY_CHUNK = 1024
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _top_k(sims: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k columns of each row, sorted by similarity descending, padded with (-inf, -1)"""
+    n_rows, n_cols = sims.shape
+    if n_cols < k:
+        sims = np.hstack([sims, np.full((n_rows, k - n_cols), -np.inf, dtype=sims.dtype)])
+        ids = np.hstack([ids, np.full((n_rows, k - n_cols), -1, dtype=ids.dtype)])
+    elif n_cols > k:
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        sims = np.take_along_axis(sims, part, axis=1)
+        ids = np.take_along_axis(ids, part, axis=1)
+
+    order = np.argsort(-sims, axis=1, kind="stable")
+    return np.take_along_axis(sims, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class AnnIndex(ABC):
+    """
+    Cosine nearest-neighbour index over unit vectors with integer ids.
+    search() returns (similarities, ids), both (n_queries, k), best first.
+    """
+    kind = None
+
+    @abstractmethod
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None):
+        ...
+
+    @abstractmethod
+    def remove(self, ids):
+        ...
+
+    def update(self, ids, vectors: np.ndarray):
+        self.remove(ids)
+        self.add(vectors, np.asarray(ids))
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def save(self, path: str):
+        ...
+
+    def _resolve_ids(self, n: int, ids: Optional[np.ndarray]) -> np.ndarray:
+        """Explicit ids as int64, or n fresh ones above every id seen so far"""
+        if ids is None:
+            start = self._id_counter
+            self._id_counter += n
+            return np.arange(start, start + n, dtype=np.int64)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            self._id_counter = max(self._id_counter, int(ids.max()) + 1)
+        return ids
+
+# ==================================================
+# BRUTE FORCE
+# ==================================================
+class BruteForceIndex(AnnIndex):
+    """
+    Exact search, one matrix product per query chunk. Rows live in a
+    buffer grown by doubling; update writes in place and remove moves the
+    last row into the freed slot, so single-centroid changes cost O(dim).
+    """
+    kind = "brute"
+
+    def __init__(self, capacity: int = 64):
+        self._vecs = None
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._count = 0
+        self._id_counter = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _reserve(self, n: int, dim: int):
+        if self._vecs is None:
+            self._vecs = np.empty((len(self._ids), dim), dtype=np.float32)
+
+        needed = self._count + n
+        if needed <= len(self._ids):
+            return
+
+        capacity = max(needed, 2 * len(self._ids))
+        for name in ("_vecs", "_ids"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None):
+        """Add vectors; an id already in the index has its vector replaced"""
+        vectors = _unit_rows(vectors)
+        ids = self._resolve_ids(len(vectors), ids)
+        self._reserve(len(vectors), vectors.shape[1])
+
+        for vec, i in zip(vectors, ids.tolist()):
+            row = self._row_of.get(i)
+            if row is None:
+                row = self._count
+                self._row_of[i] = row
+                self._ids[row] = i
+                self._count += 1
+            self._vecs[row] = vec
+
+    def update(self, ids, vectors: np.ndarray):
+        self.add(vectors, ids)
+
+    def remove(self, ids):
+        for i in np.atleast_1d(np.asarray(ids, dtype=np.int64)).tolist():
+            row = self._row_of.pop(i, None)
+            if row is None:
+                continue
+
+            last = self._count - 1
+            if row != last:
+                self._vecs[row] = self._vecs[last]
+                self._ids[row] = self._ids[last]
+                self._row_of[int(self._ids[row])] = row
+            self._count -= 1
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = _unit_rows(queries)
+        if not len(self):
+            return (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                    np.full((len(queries), k), -1, dtype=np.int64))
+
+        vecs, all_ids = self._vecs[:self._count], self._ids[:self._count]
+        out_sims, out_ids = [], []
+        for i in range(0, len(queries), _QUERY_CHUNK):
+            sims = queries[i:i + _QUERY_CHUNK] @ vecs.T
+            ids = np.broadcast_to(all_ids, sims.shape)
+            s, d = _top_k(sims, ids, k)
+            out_sims.append(s)
+            out_ids.append(d)
+        return np.vstack(out_sims), np.vstack(out_ids)
+
+    def save(self, path: str):
+        vecs = self._vecs[:self._count] if self._vecs is not None else np.empty((0, 0))
+        np.savez(path, kind=self.kind, vecs=vecs, ids=self._ids[:self._count], id_counter=self._id_counter)
+
+    @classmethod
+    def _from_npz(cls, data) -> "BruteForceIndex":
+        index = cls()
+        if data["vecs"].size:
+            index.add(data["vecs"], data["ids"])
+        index._id_counter = int(data["id_counter"])
+        return index
+
+# ==================================================
+# IVF-FLAT
+# ==================================================
+class IVFFlatIndex(AnnIndex):
+    """
+    Inverted file index: spherical k-means splits the vectors into lists,
+    a query scans only the n_probe lists whose centroids are closest.
+    """
+    kind = "ivf"
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = ANN_IVF_LISTS,
+        n_probe: int = ANN_IVF_NPROBE,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+
+        self.centroids = None
+        self._list_vecs = []
+        self._list_ids = []
+        self._list_of = {}
+        self._id_counter = 0
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _nearest_list(self, vectors: np.ndarray) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int64)
+        for i in range(0, len(vectors), _QUERY_CHUNK):
+            out[i:i + _QUERY_CHUNK] = (vectors[i:i + _QUERY_CHUNK] @ self.centroids.T).argmax(axis=1)
+        return out
+
+    def train(self, vectors: np.ndarray):
+        vectors = _unit_rows(vectors)
+        n = len(vectors)
+        n_lists = min(n, self.n_lists or max(1, int(math.sqrt(n))))
+        rng = np.random.default_rng(self.seed)
+
+        sample = vectors[rng.choice(n, min(n, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            self.centroids = centroids
+            assign = self._nearest_list(sample)
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+
+            # Empty lists restart from a random sample point
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _unit_rows(sums)
+
+        self.centroids = centroids
+        self._list_vecs = [np.empty((0, vectors.shape[1]), dtype=np.float32) for _ in range(n_lists)]
+        self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._list_of = {}
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None):
+        vectors = _unit_rows(vectors)
+        ids = self._resolve_ids(len(vectors), ids)
+        if not self.trained:
+            self.train(vectors)
+
+        lists = self._nearest_list(vectors)
+        order = np.argsort(lists, kind="stable")
+        bounds = np.flatnonzero(np.diff(lists[order])) + 1
+
+        for rows in np.split(order, bounds):
+            if not len(rows):
+                continue
+            l = int(lists[rows[0]])
+            self._list_vecs[l] = np.vstack([self._list_vecs[l], vectors[rows]])
+            self._list_ids[l] = np.concatenate([self._list_ids[l], ids[rows]])
+            for i in ids[rows]:
+                self._list_of[int(i)] = l
+
+    def remove(self, ids):
+        by_list = {}
+        for i in np.atleast_1d(ids):
+            l = self._list_of.pop(int(i), None)
+            if l is not None:
+                by_list.setdefault(l, []).append(int(i))
+
+        for l, gone in by_list.items():
+            keep = ~np.isin(self._list_ids[l], gone)
+            self._list_vecs[l] = self._list_vecs[l][keep]
+            self._list_ids[l] = self._list_ids[l][keep]
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = _unit_rows(queries)
+        nq = len(queries)
+        best_sims = np.full((nq, k), -np.inf, dtype=np.float32)
+        best_ids = np.full((nq, k), -1, dtype=np.int64)
+        if not self.trained or not len(self):
+            return best_sims, best_ids
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        coarse = queries @ self.centroids.T
+        probe = np.argpartition(-coarse, n_probe - 1, axis=1)[:, :n_probe]
+
+        # Queries grouped by probed list, each list is scanned once
+        flat = probe.ravel()
+        owners = np.repeat(np.arange(nq), n_probe)
+        order = np.argsort(flat, kind="stable")
+        bounds = np.flatnonzero(np.diff(flat[order])) + 1
+
+        for group in np.split(order, bounds):
+            l = int(flat[group[0]])
+            if not len(self._list_ids[l]):
+                continue
+            qs = owners[group]
+
+            sims = queries[qs] @ self._list_vecs[l].T
+            ids = np.broadcast_to(self._list_ids[l], sims.shape)
+            best_sims[qs], best_ids[qs] = _top_k(
+                np.hstack([best_sims[qs], sims]),
+                np.hstack([best_ids[qs], ids]),
+                k
+            )
+
+        return best_sims, best_ids
+
+    def save(self, path: str):
+        sizes = np.array([len(ids) for ids in self._list_ids], dtype=np.int64)
+        np.savez(
+            path,
+            kind=self.kind,
+            centroids=self.centroids,
+            vecs=np.vstack(self._list_vecs),
+            ids=np.concatenate(self._list_ids),
+            sizes=sizes,
+            n_probe=self.n_probe,
+            id_counter=self._id_counter
+        )
+
+    @classmethod
+    def _from_npz(cls, data) -> "IVFFlatIndex":
+        index = cls(n_lists=len(data["centroids"]), n_probe=int(data["n_probe"]))
+        index.centroids = data["centroids"]
+        index._id_counter = int(data["id_counter"])
+
+        offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+        vecs, ids = data["vecs"], data["ids"]
+        for l in range(len(index.centroids)):
+            index._list_vecs.append(vecs[offsets[l]:offsets[l + 1]])
+            index._list_ids.append(ids[offsets[l]:offsets[l + 1]])
+            for i in index._list_ids[l]:
+                index._list_of[int(i)] = l
+        return index
+
+# ==================================================
+# FACTORY
+# ==================================================
+_KINDS = {"brute": BruteForceIndex, "ivf": IVFFlatIndex}
+
+
+def build_index(vectors: np.ndarray, ids: Optional[np.ndarray] = None, kind: str = ANN_INDEX) -> AnnIndex:
+    """Index over vectors; "auto" picks brute force for small sets"""
+    if kind == "auto":
+        kind = "ivf" if len(vectors) >= ANN_MIN_ITEMS else "brute"
+
+    index = _KINDS[kind]()
+    if len(vectors):
+        index.add(vectors, ids)
+    return index
+
+
+def load_index(path: str) -> AnnIndex:
+    with np.load(path) as data:
+        return _KINDS[str(data["kind"])]._from_npz(data)
@@ -0,0 +1,245 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from db import cursor, blob_to_vec
+from config import CLUSTER_ACTIVE_WINDOW_HOURS
+from .ann import AnnIndex, build_index
+
+
+class CategoryCentroids:
+    """Centroids of one category as contiguous arrays (float32 matrix, ids, sizes, timestamps)"""
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 64):
+        self.dim = dim
+        self.count = 0
+        self.row_of: Dict[int, int] = {}
+
+        self._matrix = np.empty((capacity, dim or 0), dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._sizes = np.empty(capacity, dtype=np.int64)
+        self._created_at = np.empty(capacity, dtype=np.float64)
+        self._last_update = np.empty(capacity, dtype=np.float64)
+
+        self._index: Optional[AnnIndex] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, cluster_id: int) -> bool:
+        return cluster_id in self.row_of
+
+    # Views over the filled rows
+    @property
+    def centroids(self) -> np.ndarray:
+        return self._matrix[:self.count]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self.count]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._sizes[:self.count]
+
+    @property
+    def created_at(self) -> np.ndarray:
+        return self._created_at[:self.count]
+
+    @property
+    def last_update(self) -> np.ndarray:
+        return self._last_update[:self.count]
+
+    def ann_index(self) -> AnnIndex:
+        """Nearest-neighbour index over the centroids, ids are cluster ids"""
+        if self._index is None:
+            self._index = build_index(self.centroids, self.ids)
+        return self._index
+
+    def _reserve(self, n: int, dim: int):
+        if self.dim is None:
+            self.dim = dim
+            self._matrix = np.empty((len(self._ids), dim), dtype=np.float32)
+
+        needed = self.count + n
+        if needed <= len(self._ids):
+            return
+
+        capacity = max(needed, 2 * len(self._ids))
+        for name in ("_matrix", "_ids", "_sizes", "_created_at", "_last_update"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add_many(
+        self,
+        ids: np.ndarray,
+        centroids: np.ndarray,
+        sizes: np.ndarray,
+        created_at: np.ndarray,
+        last_update: np.ndarray
+    ):
+        n = len(ids)
+        if n == 0:
+            return
+        self._reserve(n, centroids.shape[1])
+
+        rows = slice(self.count, self.count + n)
+        self._matrix[rows] = centroids
+        self._ids[rows] = ids
+        self._sizes[rows] = sizes
+        self._created_at[rows] = created_at
+        self._last_update[rows] = last_update
+
+        for offset, cid in enumerate(ids):
+            self.row_of[int(cid)] = self.count + offset
+        self.count += n
+
+        if self._index is not None:
+            self._index.add(centroids, ids)
+
+    def add(self, cluster_id: int, centroid: np.ndarray, size: int, created_at: Optional[float] = None):
+        now = time.time()
+        self.add_many(
+            np.array([cluster_id]),
+            _unit(centroid).reshape(1, -1),
+            np.array([size]),
+            np.array([created_at or now]),
+            np.array([now])
+        )
+
+    def update(self, cluster_id: int, centroid: np.ndarray, size: int):
+        row = self.row_of.get(cluster_id)
+        if row is None:
+            return
+        self._matrix[row] = _unit(centroid)
+        self._sizes[row] = size
+        self._last_update[row] = time.time()
+
+        if self._index is not None:
+            self._index.update([cluster_id], self._matrix[row].reshape(1, -1))
+
+    def expire(self, cutoff: float) -> int:
+        """Drop clusters created before cutoff (epoch seconds), returns how many"""
+        old = self.ids[self.created_at < cutoff]
+        for cid in old:
+            self.remove(int(cid))
+        return len(old)
+
+    def remove(self, cluster_id: int):
+        """Move the last row into the freed slot"""
+        row = self.row_of.pop(cluster_id, None)
+        if row is None:
+            return
+
+        if self._index is not None:
+            self._index.remove([cluster_id])
+
+        last = self.count - 1
+        if row != last:
+            for arr in (self._matrix, self._ids, self._sizes, self._created_at, self._last_update):
+                arr[row] = arr[last]
+            self.row_of[int(self._ids[row])] = row
+        self.count -= 1
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    vec = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class CentroidStore:
+    """
+    Long-lived centroid index of the active clusters per category.
+
+    Loaded from SQLite the first time a category is used, then kept in
+    sync by create_cluster / update_cluster / merge_clusters. A recluster
+    invalidates the category so it is reloaded on next use.
+
+    Only clusters created within CLUSTER_ACTIVE_WINDOW_HOURS are held;
+    older ones stay in the clusters table (archived) but are not scanned.
+    """
+
+    def __init__(self):
+        self._categories: Dict[int, CategoryCentroids] = {}
+        self._category_of: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    def get(self, category_id: int) -> CategoryCentroids:
+        with self._lock:
+            store = self._categories.get(category_id)
+            if store is None:
+                store = self._load(category_id)
+                self._categories[category_id] = store
+            return store
+
+    def _load(self, category_id: int) -> CategoryCentroids:
+        cursor.execute("""
+            SELECT id, centroid, size,
+                   CAST(strftime('%s', created_at) AS REAL),
+                   CAST(strftime('%s', COALESCE(last_update, created_at)) AS REAL)
+            FROM clusters
+            WHERE category_id = ?
+              AND created_at >= datetime('now', ?)
+        """, (category_id, f"-{CLUSTER_ACTIVE_WINDOW_HOURS} hours"))
+        rows = cursor.fetchall()
+
+        store = CategoryCentroids(capacity=max(64, len(rows)))
+        if rows:
+            centroids = np.vstack([blob_to_vec(r[1]) for r in rows])
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+
+            store.add_many(
+                np.array([r[0] for r in rows], dtype=np.int64),
+                centroids / norms,
+                np.array([r[2] for r in rows], dtype=np.int64),
+                np.array([r[3] or 0.0 for r in rows]),
+                np.array([r[4] or 0.0 for r in rows])
+            )
+
+        for cid in store.ids:
+            self._category_of[int(cid)] = category_id
+        return store
+
+    # ==================================================
+    # SYNC HOOKS
+    # ==================================================
+    def on_create(self, category_id: int, cluster_id: int, centroid: np.ndarray, size: int):
+        with self._lock:
+            self._category_of[cluster_id] = category_id
+            store = self._categories.get(category_id)
+            if store is not None and cluster_id not in store:
+                store.add(cluster_id, centroid, size)
+
+    def on_update(self, cluster_id: int, centroid: np.ndarray, size: int):
+        with self._lock:
+            store = self._categories.get(self._category_of.get(cluster_id))
+            if store is not None:
+                store.update(cluster_id, centroid, size)
+
+    def on_remove(self, cluster_id: int):
+        with self._lock:
+            store = self._categories.get(self._category_of.pop(cluster_id, None))
+            if store is not None:
+                store.remove(cluster_id)
+
+    def invalidate(self, category_id: Optional[int] = None):
+        """Drop one category (or all), reloaded from SQLite on next use"""
+        with self._lock:
+            if category_id is None:
+                self._categories.clear()
+                self._category_of.clear()
+                return
+
+            store = self._categories.pop(category_id, None)
+            if store is not None:
+                for cid in store.ids:
+                    self._category_of.pop(int(cid), None)
+
+
+centroid_store = CentroidStore()
@@ -1,10 +1,11 @@
 import numpy as np
 from typing import Dict
 from sklearn.metrics.pairwise import cosine_distances
-from sklearn.neighbors import NearestNeighbors, LocalOutlierFactor
+from sklearn.neighbors import LocalOutlierFactor
 from scipy.spatial.distance import cdist
 
 from config import MIN_SAMPLES, EPS
+from .ann import build_index
 
 class ClusterQualityAnalyzer:
     """Analyze and improve cluster quality"""
@@ -76,11 +77,9 @@ class DynamicParameterTuner:
         if len(embeddings) < min_samples * 2:
             return EPS
             
-        # Compute k-distance
-        nbrs = NearestNeighbors(n_neighbors=min_samples, 
-                              metric='cosine', n_jobs=-1)
-        nbrs.fit(embeddings)
-        distances, _ = nbrs.kneighbors(embeddings)
+        # Compute k-distance (each point is its own first neighbour)
+        sims, _ = build_index(embeddings).search(embeddings, min_samples)
+        distances = 1.0 - sims
         
         # Sort distances
         k_distances = np.sort(distances[:, -1])
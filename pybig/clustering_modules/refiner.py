@@ -1,13 +1,16 @@
 import numpy as np
 from typing import List, Dict, Tuple
 from datetime import datetime, timedelta
-from sklearn.neighbors import NearestNeighbors
 from sklearn.metrics.pairwise import cosine_distances
 from sklearn.preprocessing import normalize
 
 from db import cursor, conn, blob_to_vec, vec_to_blob
 from config import MERGE_SIMILARITY_THRESHOLD
 from hot_score import update_cluster_hot_score
+import cluster_stats
+import rankings
+from .centroid_store import centroid_store
+from .ann import build_index
 
 class ClusterRefiner:
     """Refine clusters by merging and splitting - OPTIMIZED"""
@@ -17,23 +20,21 @@ class ClusterRefiner:
         
     def find_merge_candidates(self, clusters: List[Dict], 
                             embeddings_dict: Dict[int, np.ndarray] = None) -> List[Tuple[int, int]]:
-        """Find clusters that should be merged - OPTIMIZED with NearestNeighbors"""
+        """Find clusters that should be merged - OPTIMIZED with the ANN index"""
         n_clusters = len(clusters)
         if n_clusters < 2:
             return []
             
         candidates = []
         
-        # OPTIMIZATION: Use NearestNeighbors instead of O(N²) loop
+        # OPTIMIZATION: Use the ANN index instead of O(N²) loop
         centroids = np.array([c['centroid'] for c in clusters])
         ids = [c['id'] for c in clusters]
         created_ats = [c.get('created_at', datetime.utcnow()) for c in clusters]
         
-        # Build KNN index
+        # Build KNN index (ids are positions in clusters)
         n_neighbors = min(10, n_clusters)
-        nbrs = NearestNeighbors(n_neighbors=n_neighbors, metric='cosine', n_jobs=-1)
-        nbrs.fit(centroids)
-        distances, indices = nbrs.kneighbors(centroids)
+        sims, indices = build_index(centroids).search(centroids, n_neighbors)
         
         now = datetime.utcnow()
         seen_pairs = set()
@@ -46,7 +47,7 @@ class ClusterRefiner:
                 continue
                 
             for j_idx, neighbor_idx in enumerate(indices[i]):
-                if i == neighbor_idx:
+                if i == neighbor_idx or neighbor_idx < 0:
                     continue
                     
                 c2_id = ids[neighbor_idx]
@@ -61,8 +62,7 @@ class ClusterRefiner:
                 if age2 < timedelta(hours=2):
                     continue
                     
-                # Convert distance to similarity
-                sim = 1.0 - distances[i][j_idx]
+                sim = sims[i][j_idx]
                 
                 if sim >= self.similarity_threshold:
                     candidates.append((c1_id, c2_id, sim))
@@ -103,11 +103,16 @@ class ClusterRefiner:
             WHERE cluster_id = ?
         """, (cluster_id1, cluster_id2))
         
-        # Delete second cluster
+        # Move counters, then delete second cluster
+        cluster_stats.merge(cluster_id1, cluster_id2)
         cursor.execute("DELETE FROM clusters WHERE id = ?", (cluster_id2,))
+        rankings.refresh_representatives([cluster_id1])
         
         update_cluster_hot_score(cluster_id1)
         conn.commit()
+
+        centroid_store.on_update(cluster_id1, new_centroid, size1 + size2)
+        centroid_store.on_remove(cluster_id2)
     
     def split_heterogeneous_cluster(self, cluster_id: int, 
                                   embeddings: np.ndarray,
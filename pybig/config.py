@@ -5,6 +5,40 @@ DB_PATH = "news.db"
 # =========================
 SIM_THRESHOLD = 0.90
 EMBED_BATCH_SIZE = 32
+# Max padded tokens (texts * longest text) per encode batch
+EMBED_TOKEN_BUDGET = 8192
+
+# Content-hash -> vector cache (separate SQLite file)
+EMBED_CACHE_ENABLED = True
+EMBED_CACHE_PATH = "embed_cache.db"
+EMBED_CACHE_MEMORY_ITEMS = 5000
+EMBED_CACHE_MAX_ITEMS = 200000
+
+# "torch" (SentenceTransformer) | "onnx" (onnxruntime on CPU, exported
+# once to ONNX_CACHE_DIR, dynamic int8 when ONNX_QUANTIZE)
+EMBED_BACKEND = "torch"
+ONNX_CACHE_DIR = "onnx_models"
+ONNX_QUANTIZE = True
+ONNX_THREADS = 0  # 0 = onnxruntime default
+# An export loads only if the mean cosine between its vectors and the torch
+# model's on onnx_backend.PARITY_TEXTS reaches this (int8 is typically ~0.995).
+# Measured once per model file and kept in embedder_meta.json;
+# `python onnx_backend.py` re-measures and exits 1 below it
+ONNX_PARITY_MIN_COSINE = 0.99
+
+# "local" loads the model in-process, "client" sends texts to embed_server
+# (falls back to local when the server is unreachable)
+EMBED_MODE = "local"
+EMBED_SERVER_HOST = "127.0.0.1"
+EMBED_SERVER_PORT = 8765
+EMBED_SERVER_URL = f"http://{EMBED_SERVER_HOST}:{EMBED_SERVER_PORT}"
+EMBED_SERVER_TIMEOUT = 120
+# After a failed request, embed locally for this long before trying the server again
+EMBED_SERVER_RETRY_SECONDS = 45
+# Micro-batching: wait up to MAX_WAIT_MS after the first request for
+# more callers, or until MAX_TEXTS texts are queued
+EMBED_SERVER_MAX_WAIT_MS = 20
+EMBED_SERVER_MAX_TEXTS = 256
 
 # =========================
 # CLUSTERING
@@ -23,10 +57,47 @@ DYNAMIC_EPS_ENABLED = True
 
 DRIFT_DETECTION_WINDOW = 30
 
+# Clusters created within this window are "active" and take new articles;
+# older ones leave the assignment index but stay in the clusters table
+CLUSTER_ACTIVE_WINDOW_HOURS = 48
+
+# Nearest-neighbour index for centroids / articles:
+# "auto" (brute force below ANN_MIN_ITEMS vectors, IVF-flat above),
+# "brute" or "ivf". IVF lists default to sqrt(n), ANN_IVF_NPROBE of them
+# are scanned per query.
+ANN_INDEX = "auto"
+ANN_MIN_ITEMS = 20000
+ANN_IVF_LISTS = None
+ANN_IVF_NPROBE = 8
+
 # =========================
 # HOT SCORE
 # =========================
 HOT_DECAY_HOURS = 12
+# Member reads within this window boost the score
+HOT_READS_WINDOW_HOURS = 24
+# Scores below HOT_SCORE_FLOOR are stored as 0; a cluster at 0 with no
+# update or recent article is skipped until it changes again. Scores that
+# moved by less than HOT_SCORE_MIN_DELTA are not written back.
+HOT_SCORE_FLOOR = 1e-3
+HOT_SCORE_MIN_DELTA = 1e-4
+# Hourly view / read / report / article buckets kept in cluster_stats_hourly
+CLUSTER_STATS_RETENTION_HOURS = 48
+
+# Precomputed cluster_rankings read by the homepage: top clusters overall,
+# per category, published today and trending (RANKING_TRENDING_HOURS)
+RANKING_GLOBAL_SIZE = 1000
+RANKING_SIZE = 100
+RANKING_TRENDING_HOURS = 48
+
+# =========================
+# VIEW EVENTS
+# =========================
+# The Next.js view route only appends to view_events; view_ingest drains
+# up to VIEW_INGEST_BATCH events per transaction (every scheduler cycle,
+# or every VIEW_INGEST_INTERVAL seconds when run standalone)
+VIEW_INGEST_BATCH = 5000
+VIEW_INGEST_INTERVAL = 10
 
 # =========================
 # SCHEDULER
@@ -34,6 +105,32 @@ HOT_DECAY_HOURS = 12
 BATCH_INTERVAL = 600
 RECLUSTER_INTERVAL = 7200
 
+# "incremental": only clusters marked dirty since the last pass (new
+# members, centroid drift >= RECLUSTER_DRIFT_THRESHOLD, low cohesion) and
+# their neighbours with centroid similarity >= RECLUSTER_NEIGHBOR_SIM are
+# re-clustered; other cluster ids are untouched. "full": rebuild categories.
+RECLUSTER_MODE = "incremental"
+RECLUSTER_NEIGHBOR_SIM = 0.80
+RECLUSTER_DRIFT_THRESHOLD = 0.05
+
+# Full recluster: newest RECLUSTER_MAX_ARTICLES articles per category,
+# clustered RECLUSTER_CHUNK_SIZE at a time to bound memory
+RECLUSTER_MAX_ARTICLES = 10000
+RECLUSTER_CHUNK_SIZE = 2000
+# Full recluster of several categories: process pool size
+# (None = CPU count, 0 = in-process)
+RECLUSTER_WORKERS = None
+
+# =========================
+# INGEST
+# =========================
+# Crawled articles are embedded / inserted / clustered in micro-batches of
+# up to INGEST_BATCH_SIZE, flushed INGEST_MAX_WAIT seconds after the first
+# article arrives. At most INGEST_QUEUE_SIZE articles wait between stages.
+INGEST_BATCH_SIZE = 32
+INGEST_MAX_WAIT = 2.0
+INGEST_QUEUE_SIZE = 256
+
 # =========================
 # CRAWLER
 # =========================
@@ -41,6 +138,33 @@ CRAWL_MAX_WORKERS = 10
 CRAWL_TIMEOUT = 15
 CRAWL_RETRY_ATTEMPTS = 2
 
+# Async engine (falls back to thread-per-feed if aiohttp is missing)
+CRAWL_ASYNC_ENABLED = True
+CRAWL_MAX_CONCURRENCY = 32
+CRAWL_PER_HOST_CONNECTIONS = 4
+
+# Per-host protection: token bucket (requests/sec, burst), retry backoff
+# (seconds) and a circuit breaker that skips a host for CIRCUIT_COOLDOWN
+# seconds after CIRCUIT_FAILURE_THRESHOLD consecutive failures
+HOST_RATE_PER_SEC = 4.0
+HOST_BURST = 8
+CRAWL_BACKOFF_BASE = 0.5
+CRAWL_BACKOFF_MAX = 8.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 120
+
+# Parse stage: process pool size (None = CPU count, 0 = parse inline)
+# and max raw pages waiting for / being parsed
+PARSE_WORKERS = None
+PARSE_QUEUE_SIZE = 64
+
+# Entries older than (feed watermark - grace) are dropped, newer ones are
+# checked against the GUIDs already seen for that feed
+FEED_WATERMARK_GRACE_HOURS = 48
+
+# "auto" | "selectolax" | "lxml" | "bs4" (BeautifulSoup is always the fallback)
+EXTRACTOR_BACKEND = "auto"
+
 FETCH_FULL_CONTENT = True
 MAX_ENTRIES_PER_FEED = None
 
@@ -1,37 +1,157 @@
+import html as html_utils
+import feedparser
 import requests
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from bs4 import BeautifulSoup
-from config import HEADERS, CRAWL_TIMEOUT
+from config import HEADERS, CRAWL_TIMEOUT, CATEGORIES
+from host_guard import host_guard, check_status, HostUnavailable
+import feed_state
+from url_index import url_index
+import extractors
 
 # Use a session for connection pooling
 session = requests.Session()
 session.headers.update(HEADERS)
 
-def parse_description(html):
+def make_soup(text):
     # Use lxml for faster parsing if available, fallback to html.parser
     try:
-        soup = BeautifulSoup(html, "lxml")
+        return BeautifulSoup(text, "lxml")
     except:
-        soup = BeautifulSoup(html, "html.parser")
-        
+        return BeautifulSoup(text, "html.parser")
+
+def parse_description(html):
+    try:
+        fast = extractors.parse_description(html)
+        if fast is not None:
+            return fast
+    except Exception:
+        pass
+
+    soup = make_soup(html)
     img = soup.find("img")
     image = img["src"] if img else None
     summary = soup.get_text(" ", strip=True)
     return summary, image
 
-def fetch_html(url):
-    try:
+def guarded_get(url, headers=None):
+    """GET through host_guard (rate limit, circuit breaker, retries)"""
+    def send():
         # Use session instead of requests.get
-        r = session.get(url, timeout=CRAWL_TIMEOUT)
+        r = session.get(url, headers=headers, timeout=CRAWL_TIMEOUT)
+        check_status(r.status_code, url)
+        return r
+
+    return host_guard.get(url, send, (requests.RequestException,))
+
+def fetch_text(url):
+    try:
+        r = guarded_get(url)
         r.encoding = 'utf-8'
-        
-        try:
-            return BeautifulSoup(r.text, "lxml")
-        except:
-            return BeautifulSoup(r.text, "html.parser")
+        return r.text
+    except HostUnavailable:
+        return None
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+def fetch_html(url):
+    text = fetch_text(url)
+    if text is None:
+        return None
+    return make_soup(text)
+
+def fetch_feed(rss_url):
+    """
+    Conditional GET for a feed.
+    Returns the body, or None when the feed is unchanged or unreachable.
+    """
+    try:
+        r = guarded_get(rss_url, headers=feed_state.conditional_headers(rss_url))
+        if r.status_code != 304:
+            r.raise_for_status()
+    except HostUnavailable:
+        return None
+    except Exception as e:
+        print(f"Error fetching {rss_url}: {e}")
+        return None
+
+    if not feed_state.check_feed(rss_url, r.status_code, r.headers, r.content):
+        return None
+    return r.content
+
+# ==================================================
+# RSS ENTRIES
+# ==================================================
+def parse_published(published):
+    """Parse an RSS date string, returns None when missing or invalid"""
+    if not published:
+        return None
+    try:
+        return parsedate_to_datetime(published)
+    except:
+        return None
+
+def feed_entries(feed, limit=None):
+    """
+    Turn a parsed feed (or raw feed bytes) into plain entry dicts.
+    Description parsing happens here, once per entry.
+    """
+    if isinstance(feed, (bytes, str)):
+        feed = feedparser.parse(feed)
+
+    entries = []
+    for item in feed.entries[:limit]:
+        try:
+            summary, image = parse_description(item.get("description", ""))
+            if item.get("enclosures"):
+                image = item.enclosures[0].get("url") or image
+
+            published_dt = parse_published(item.get("published", ""))
+            published_at = (published_dt or datetime.utcnow()).strftime("%Y-%m-%d %H:%M:%S")
+
+            entries.append({
+                "link": item.link,
+                "guid": item.get("id") or item.link,
+                "title": item.title,
+                "summary": summary,
+                "image": image,
+                "published_dt": published_dt,
+                "published_at": published_at,
+            })
+        except Exception:
+            continue
+    return entries
+
+def accept_entry(source, rss_url, entry):
+    """Entry filter run before any article fetch: drop stored URLs and known GUIDs"""
+    if entry["link"] in url_index:
+        return False
+    return feed_state.is_new_entry(source, rss_url, entry)
+
+def build_article(source, category_slug, entry, content=""):
+    """Build the article dict consumed by main.process_articles"""
+    if not content:
+        content = entry["summary"]
+
+    return {
+        "url": entry["link"],
+        "title": html_utils.unescape(entry["title"]),
+        "content": html_utils.unescape(content),
+        "summary": html_utils.unescape(entry["summary"]),
+        "image_url": entry["image"],
+        "source": source,
+        "published_at": entry["published_at"],
+        "category": {
+            "name": CATEGORIES.get(category_slug, category_slug),
+            "slug": category_slug
+        }
+    }
+
+# ==================================================
+# CONTENT EXTRACTION
+# ==================================================
 def extract_p_text(article):
     if not article:
         return ""
@@ -48,33 +168,23 @@ def extract_p_text(article):
 
     return "\n".join(content)
 
-def fetch_vnexpress(url):
-    soup = fetch_html(url)
-    if not soup: return ""
+def extract_vnexpress(soup):
     article = soup.find("article", class_="fck_detail")
     return extract_p_text(article)
 
-def fetch_tuoitre(url):
-    soup = fetch_html(url)
-    if not soup: return ""
+def extract_tuoitre(soup):
     article = soup.find("div", class_="detail-content")
     return extract_p_text(article)
 
-def fetch_dantri(url):
-    soup = fetch_html(url)
-    if not soup: return ""
+def extract_dantri(soup):
     article = soup.find("div", class_="singular-content")
     return extract_p_text(article)
 
-def fetch_thanhnien(url):
-    soup = fetch_html(url)
-    if not soup: return ""
+def extract_thanhnien(soup):
     article = soup.find("article") or soup.find("div", class_="content-detail")
     return extract_p_text(article)
 
-def fetch_vietnamnet(url):
-    soup = fetch_html(url)
-    if not soup: return ""
+def extract_vietnamnet(soup):
     article = (
         soup.find("div", class_="maincontent")
         or soup.find("div", class_="content-detail")
@@ -87,6 +197,60 @@ def fetch_vietnamnet(url):
         if "vietnamnet" not in line.lower()
     )
 
+EXTRACTORS = {
+    "VNExpress": extract_vnexpress,
+    "Tuổi Trẻ": extract_tuoitre,
+    "Dân Trí": extract_dantri,
+    "Thanh Niên": extract_thanhnien,
+    "VietnamNet": extract_vietnamnet,
+}
+
+def extract_content(source, html):
+    """
+    Extract article text from an already downloaded page.
+    Fast selector backend first, BeautifulSoup as fallback.
+    """
+    extractor = EXTRACTORS.get(source)
+    if not extractor or not html:
+        return ""
+
+    try:
+        fast = extractors.extract_content(source, html)
+        if fast is not None:
+            return fast
+    except Exception:
+        pass
+
+    return extractor(make_soup(html))
+
+# ==================================================
+# FETCHERS (download + extract)
+# ==================================================
+def fetch_vnexpress(url):
+    html = fetch_text(url)
+    if not html: return ""
+    return extract_content("VNExpress", html)
+
+def fetch_tuoitre(url):
+    html = fetch_text(url)
+    if not html: return ""
+    return extract_content("Tuổi Trẻ", html)
+
+def fetch_dantri(url):
+    html = fetch_text(url)
+    if not html: return ""
+    return extract_content("Dân Trí", html)
+
+def fetch_thanhnien(url):
+    html = fetch_text(url)
+    if not html: return ""
+    return extract_content("Thanh Niên", html)
+
+def fetch_vietnamnet(url):
+    html = fetch_text(url)
+    if not html: return ""
+    return extract_content("VietnamNet", html)
+
 FETCHERS = {
     "VNExpress": fetch_vnexpress,
     "Tuổi Trẻ": fetch_tuoitre,
@@ -1,16 +1,20 @@
 import sqlite3
 import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
 from config import DB_PATH
 
 import math
 
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-# Register math functions for SQLite
-conn.create_function("LOG", 1, math.log)
-conn.create_function("EXP", 1, math.exp)
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False)
+    # Register math functions for SQLite
+    connection.create_function("LOG", 1, math.log)
+    connection.create_function("EXP", 1, math.exp)
+    connection.execute("PRAGMA journal_mode=WAL;").fetchone()
+    return connection
 
+conn = connect(DB_PATH)
 cursor = conn.cursor()
-cursor.execute("PRAGMA journal_mode=WAL;")
 
 
 def vec_to_blob(vec: np.ndarray) -> bytes:
@@ -19,8 +23,9 @@ def vec_to_blob(vec: np.ndarray) -> bytes:
 def blob_to_vec(blob: bytes) -> np.ndarray:
     return np.frombuffer(blob, dtype="float32")
 
-def init_db():
-    cursor.executescript("""
+def init_db(connection: Optional[sqlite3.Connection] = None):
+    connection = connection or conn
+    connection.executescript("""
     PRAGMA foreign_keys = ON;
 
     CREATE TABLE IF NOT EXISTS categories (
@@ -62,6 +67,9 @@ def init_db():
         hot_score REAL NOT NULL DEFAULT 0,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         last_update DATETIME DEFAULT CURRENT_TIMESTAMP,
+        recluster_tag TEXT, -- khác NULL: cluster tạm của một lần recluster chưa swap
+        representative_news_id INTEGER, -- bài mới nhất không bị ẩn do report
+        representative_published_at DATETIME,
         FOREIGN KEY (category_id) REFERENCES categories(id)
             ON DELETE CASCADE
     );
@@ -115,9 +123,107 @@ def init_db():
         ON DELETE CASCADE
     );
 
+    -- HTTP validators cho từng RSS feed (conditional GET)
+    CREATE TABLE IF NOT EXISTS feed_state (
+        rss_url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        content_hash TEXT,
+        checked_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- High-water mark cho từng (source, feed)
+    CREATE TABLE IF NOT EXISTS feed_watermarks (
+        source TEXT NOT NULL,
+        rss_url TEXT NOT NULL,
+        last_published_at DATETIME,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (source, rss_url)
+    );
+
+    -- GUID đã thấy trong cửa sổ grace của watermark
+    CREATE TABLE IF NOT EXISTS feed_seen_guids (
+        source TEXT NOT NULL,
+        rss_url TEXT NOT NULL,
+        guid TEXT NOT NULL,
+        published_at DATETIME,
+        PRIMARY KEY (source, rss_url, guid)
+    );
+
+    -- Cluster thay đổi từ lần recluster trước (recluster tăng dần)
+    CREATE TABLE IF NOT EXISTS cluster_dirty (
+        cluster_id INTEGER PRIMARY KEY,
+        category_id INTEGER NOT NULL,
+        reason TEXT NOT NULL, -- members / new / drift / cohesion
+        marked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (cluster_id) REFERENCES clusters(id)
+            ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_cluster_dirty_category
+        ON cluster_dirty(category_id);
+
+    -- Bộ đếm tổng của từng cluster (cộng dồn, hot score không cần quét news)
+    CREATE TABLE IF NOT EXISTS cluster_stats (
+        cluster_id INTEGER PRIMARY KEY,
+        articles INTEGER NOT NULL DEFAULT 0,
+        views INTEGER NOT NULL DEFAULT 0,
+        reports INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (cluster_id) REFERENCES clusters(id)
+            ON DELETE CASCADE
+    );
+
+    -- Bộ đếm theo giờ (bucket = unix time / 3600) cho các cửa sổ gần đây
+    CREATE TABLE IF NOT EXISTS cluster_stats_hourly (
+        cluster_id INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        articles INTEGER NOT NULL DEFAULT 0, -- bài có published_at trong giờ này
+        views INTEGER NOT NULL DEFAULT 0,
+        reads INTEGER NOT NULL DEFAULT 0, -- lượt đọc của thành viên (read_logs)
+        reports INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (cluster_id, bucket),
+        FOREIGN KEY (cluster_id) REFERENCES clusters(id)
+            ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_cluster_stats_hourly_bucket
+        ON cluster_stats_hourly(bucket);
+
+    -- Hàng đợi lượt xem: route view của Next.js chỉ INSERT, view_ingest.py gom theo lô
+    CREATE TABLE IF NOT EXISTS view_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        news_id INTEGER NOT NULL,
+        user_id INTEGER, -- NULL nếu xem ẩn danh
+        url TEXT,
+        viewed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Bảng xếp hạng tính sẵn cho trang chủ (pybig ghi lại sau mỗi lần tính hot score)
+    CREATE TABLE IF NOT EXISTS cluster_rankings (
+        scope TEXT NOT NULL, -- global / category / today / trending
+        scope_id INTEGER NOT NULL DEFAULT 0, -- category_id khi scope = category
+        rank INTEGER NOT NULL,
+        cluster_id INTEGER NOT NULL,
+        news_id INTEGER NOT NULL, -- bài đại diện đã chọn sẵn
+        score REAL NOT NULL,
+        computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (scope, scope_id, rank),
+        FOREIGN KEY (cluster_id) REFERENCES clusters(id)
+            ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
     CREATE INDEX IF NOT EXISTS idx_clusters_hot
         ON clusters(category_id, hot_score DESC);
 
+    -- Cluster nóng toàn hệ thống (trang chủ)
+    CREATE INDEX IF NOT EXISTS idx_clusters_hot_score
+        ON clusters(hot_score DESC);
+
+    -- Cluster đang hoạt động (cửa sổ created_at) của từng category
+    CREATE INDEX IF NOT EXISTS idx_clusters_category_created
+        ON clusters(category_id, created_at);
+
     -- Bài mới trong cluster
     CREATE INDEX IF NOT EXISTS idx_news_cluster_time
         ON news(cluster_id, published_at DESC);
@@ -126,6 +232,10 @@ def init_db():
     CREATE INDEX IF NOT EXISTS idx_news_category_time
         ON news(category_id, published_at DESC);
 
+    -- Bài mới toàn hệ thống (hoạt động gần đây cho hot score)
+    CREATE INDEX IF NOT EXISTS idx_news_published
+        ON news(published_at);
+
     -- Tìm bài theo URL
     CREATE INDEX IF NOT EXISTS idx_news_url
         ON news(url);
@@ -141,8 +251,108 @@ def init_db():
 
     CREATE INDEX IF NOT EXISTS idx_read_logs_news
         ON read_logs(news_id);
+
+    -- Tìm lượt đọc theo URL
+    CREATE INDEX IF NOT EXISTS idx_read_logs_url
+        ON read_logs(url);
     
     CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_unique
         ON reports(news_id, user_id);
     """)
-    conn.commit()
+    _ensure_column(connection, "clusters", "recluster_tag", "TEXT")
+    _ensure_column(connection, "clusters", "representative_news_id", "INTEGER")
+    _ensure_column(connection, "clusters", "representative_published_at", "DATETIME")
+    connection.commit()
+
+def _ensure_column(connection: sqlite3.Connection, table: str, column: str, decl: str):
+    """Add a column to a table created by an older schema"""
+    columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# ==================================================
+# BULK INGEST
+# ==================================================
+NEWS_INSERT_COLUMNS = (
+    "url",
+    "title",
+    "content",
+    "summary",
+    "image_url",
+    "source",
+    "published_at",
+    "category_id",
+    "embedding",
+)
+
+_category_ids: Dict[str, int] = {}
+
+def get_category_id(cat: Dict, connection: Optional[sqlite3.Connection] = None) -> int:
+    """Category id by slug, created if missing. Cached, no commit."""
+    slug = cat["slug"]
+    if slug in _category_ids:
+        return _category_ids[slug]
+
+    connection = connection or conn
+    connection.execute(
+        "INSERT OR IGNORE INTO categories (name, slug) VALUES (?, ?)",
+        (cat["name"], slug)
+    )
+    row = connection.execute(
+        "SELECT id FROM categories WHERE slug = ? OR name = ? ORDER BY slug = ? DESC",
+        (slug, cat["name"], slug)
+    ).fetchone()
+
+    _category_ids[slug] = row[0]
+    return row[0]
+
+def clear_category_cache():
+    _category_ids.clear()
+
+def insert_news_bulk(
+    rows: Sequence[Tuple],
+    connection: Optional[sqlite3.Connection] = None,
+    commit: bool = True
+) -> List[Optional[int]]:
+    """
+    INSERT OR IGNORE many news rows (NEWS_INSERT_COLUMNS order) in one
+    transaction. Returns the new id of each row, None for rows skipped
+    because their url already exists.
+
+    The write lock is taken before reading MAX(id), so every id above it
+    belongs to this batch (AUTOINCREMENT never reuses ids).
+    """
+    if not rows:
+        return []
+
+    connection = connection or conn
+    if not connection.in_transaction:
+        connection.execute("BEGIN IMMEDIATE")
+
+    try:
+        (before,) = connection.execute("SELECT COALESCE(MAX(id), 0) FROM news").fetchone()
+
+        columns = ", ".join(NEWS_INSERT_COLUMNS)
+        placeholders = ", ".join("?" * len(NEWS_INSERT_COLUMNS))
+        connection.executemany(
+            f"INSERT OR IGNORE INTO news ({columns}) VALUES ({placeholders})",
+            rows
+        )
+
+        new_ids = {
+            url: news_id for news_id, url in
+            connection.execute("SELECT id, url FROM news WHERE id > ?", (before,))
+        }
+    except Exception:
+        connection.rollback()
+        raise
+
+    if commit:
+        connection.commit()
+
+    # A url repeated inside the batch maps to its first (inserted) row only
+    ids = []
+    for row in rows:
+        ids.append(new_ids.pop(row[0], None))
+    return ids
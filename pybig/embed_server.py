@@ -0,0 +1,216 @@
+"""
+Local embedding server.
+
+Keeps one warm model for every process on the machine (crawler,
+reclusterer, search). Requests from all callers go into one queue and
+are encoded together in micro-batches: the batcher waits at most
+EMBED_SERVER_MAX_WAIT_MS after the first request, or until
+EMBED_SERVER_MAX_TEXTS texts are queued.
+
+    python embed_server.py [--host 127.0.0.1] [--port 8765]
+
+API (HTTP on localhost, so it also runs on Windows):
+    POST /embed   {"texts": [...], "normalize": true}
+                  -> float32 row-major bytes, X-Embedding-Dim header
+    GET  /health  -> model, batching and cache stats as JSON
+
+Clients: set EMBED_MODE = "client" and embedder.embed() uses it.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+from config import (
+    EMBED_SERVER_HOST,
+    EMBED_SERVER_PORT,
+    EMBED_SERVER_MAX_WAIT_MS,
+    EMBED_SERVER_MAX_TEXTS,
+)
+import embedder
+
+
+class _Request:
+    __slots__ = ("texts", "normalize", "done", "vectors", "error")
+
+    def __init__(self, texts: List[str], normalize: bool):
+        self.texts = texts
+        self.normalize = normalize
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+# ==================================================
+# MICRO-BATCHER
+# ==================================================
+class MicroBatcher:
+    """Single encode thread fed by a queue of caller requests"""
+
+    def __init__(self, max_wait_ms: float = EMBED_SERVER_MAX_WAIT_MS, max_texts: int = EMBED_SERVER_MAX_TEXTS):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_texts = max_texts
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str], normalize: bool = True) -> np.ndarray:
+        """Blocks until the batch containing these texts is encoded"""
+        req = _Request(texts, normalize)
+        self._queue.put(req)
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.vectors
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self) -> List[_Request]:
+        first = self._queue.get()
+        batch = [first]
+        count = len(first.texts)
+
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(req)
+            count += len(req.texts)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.requests += len(batch)
+            self.batches += 1
+
+            for normalize in (True, False):
+                group = [r for r in batch if r.normalize == normalize]
+                if not group:
+                    continue
+
+                texts = [t for r in group for t in r.texts]
+                self.texts += len(texts)
+                try:
+                    vectors = embedder.embed(texts, normalize=normalize, mode="local")
+                    offset = 0
+                    for r in group:
+                        r.vectors = vectors[offset:offset + len(r.texts)]
+                        offset += len(r.texts)
+                except Exception as e:
+                    for r in group:
+                        r.error = e
+
+                for r in group:
+                    r.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "pending": self.pending(),
+        }
+
+# ==================================================
+# HTTP
+# ==================================================
+class EmbedHandler(BaseHTTPRequestHandler):
+    batcher: MicroBatcher = None
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        self._send_json(200, {
+            "model": embedder._model_name,
+            "batching": self.batcher.stats(),
+            "cache": embedder.cache_stats(),
+            "throughput": embedder.throughput_stats(),
+        })
+
+    def do_POST(self):
+        if self.path != "/embed":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            texts = payload["texts"]
+            normalize = bool(payload.get("normalize", True))
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("texts must be a list of strings")
+        except Exception as e:
+            self._send_json(400, {"error": f"bad request: {e}"})
+            return
+
+        try:
+            if texts:
+                vectors = self.batcher.submit(texts, normalize)
+            else:
+                vectors = np.empty((0, embedder.get_model().get_sentence_embedding_dimension()))
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        body = np.ascontiguousarray(vectors, dtype="float32").tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Embedding-Dim", str(vectors.shape[1]))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = EMBED_SERVER_HOST, port: int = EMBED_SERVER_PORT):
+    embedder.get_model()
+
+    EmbedHandler.batcher = MicroBatcher()
+    server = ThreadingHTTPServer((host, port), EmbedHandler)
+    server.daemon_threads = True
+
+    print(f"✓ Embedding server listening on http://{host}:{port} ({embedder._model_name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down embedding server...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=EMBED_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=EMBED_SERVER_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
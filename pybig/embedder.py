@@ -1,15 +1,44 @@
 import os
+import json
 import threading
+import time
+import urllib.error
+import urllib.request
 import numpy as np
-from typing import List, Union
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional, Union, TYPE_CHECKING
+
+from config import (
+    EMBED_CACHE_ENABLED,
+    EMBED_BACKEND,
+    EMBED_TOKEN_BUDGET,
+    EMBED_MODE,
+    EMBED_SERVER_URL,
+    EMBED_SERVER_TIMEOUT,
+    EMBED_SERVER_RETRY_SECONDS,
+)
+from embedding_cache import EmbeddingCache
+from onnx_backend import OnnxEncoder, ParityError, ONNX_AVAILABLE
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # ==================================================
 # GLOBALS
 # ==================================================
 _model = None
+_model_name = None
 _model_lock = threading.Lock()
 
+_cache = None
+
+# Totals over the non-cached encode calls, for tokens/sec reporting
+_throughput = {"texts": 0, "tokens": 0, "seconds": 0.0}
+_throughput_lock = threading.Lock()
+
+# time.monotonic() of the last failed server request (client mode); the
+# server is skipped until EMBED_SERVER_RETRY_SECONDS have passed
+_server_down_at: Optional[float] = None
+
 DEFAULT_MODEL = "bkai-foundation-models/vietnamese-bi-encoder"
 FALLBACK_MODEL = "intfloat/multilingual-e5-base"
 
@@ -19,11 +48,30 @@ DEVICE = "cuda" if os.environ.get("USE_GPU", "0") == "1" else "cpu"
 # ==================================================
 # MODEL LOADER
 # ==================================================
-def get_model() -> SentenceTransformer:
+def _load(model_name: str):
+    """Load one model on the configured backend, returns (model, cache namespace)"""
+    if EMBED_BACKEND == "onnx" and DEVICE == "cpu":
+        if not ONNX_AVAILABLE:
+            print("⚠ onnxruntime not installed, using torch backend")
+        else:
+            try:
+                model = OnnxEncoder(model_name)
+                tag = "onnx-int8" if model.quantized else "onnx"
+                return model, f"{model_name}@{tag}"
+            except ParityError as e:
+                # Same model on torch: the fallback model would not match stored vectors
+                print(f"⚠ {e}, using torch backend")
+
+    # Imported here so client-mode processes never load torch
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=DEVICE), model_name
+
+
+def get_model() -> Union["SentenceTransformer", OnnxEncoder]:
     """
     Thread-safe lazy loading of embedding model
     """
-    global _model
+    global _model, _model_name
 
     if _model is not None:
         return _model
@@ -33,16 +81,108 @@ def get_model() -> SentenceTransformer:
             return _model
 
         try:
-            _model = SentenceTransformer(DEFAULT_MODEL, device=DEVICE)
-            print(f"✓ Loaded Vietnamese model: {DEFAULT_MODEL} ({DEVICE})")
+            _model, _model_name = _load(DEFAULT_MODEL)
+            print(f"✓ Loaded Vietnamese model: {_model_name} ({DEVICE})")
         except Exception as e:
             print(f"⚠ Failed to load Vietnamese model: {e}")
-            _model = SentenceTransformer(FALLBACK_MODEL, device=DEVICE)
-            print(f"✓ Loaded fallback model: {FALLBACK_MODEL} ({DEVICE})")
+            _model, _model_name = _load(FALLBACK_MODEL)
+            print(f"✓ Loaded fallback model: {_model_name} ({DEVICE})")
 
     return _model
 
 
+def get_cache() -> EmbeddingCache:
+    """Embedding cache namespaced by the model actually loaded"""
+    global _cache
+
+    if _cache is None:
+        get_model()
+        with _model_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(_model_name)
+    return _cache
+
+
+def cache_stats() -> dict:
+    return _cache.stats() if _cache is not None else {}
+
+
+def throughput_stats() -> dict:
+    with _throughput_lock:
+        stats = dict(_throughput)
+    stats["tokens_per_sec"] = stats["tokens"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+# ==================================================
+# SERVER CLIENT
+# ==================================================
+def _server_available() -> bool:
+    return _server_down_at is None or time.monotonic() - _server_down_at >= EMBED_SERVER_RETRY_SECONDS
+
+def _embed_remote(texts: List[str], normalize: bool) -> Optional[np.ndarray]:
+    """Vectors from embed_server, None when it cannot be reached"""
+    global _server_down_at
+
+    request = urllib.request.Request(
+        f"{EMBED_SERVER_URL}/embed",
+        data=json.dumps({"texts": texts, "normalize": normalize}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=EMBED_SERVER_TIMEOUT) as resp:
+            dim = int(resp.headers["X-Embedding-Dim"])
+            body = resp.read()
+        if _server_down_at is not None:
+            print(f"✓ Embedding server back at {EMBED_SERVER_URL}")
+            _server_down_at = None
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Embedding server error {e.code}: {e.read().decode('utf-8', 'replace')}")
+    except (urllib.error.URLError, OSError) as e:
+        if _server_down_at is None:
+            print(f"⚠ Embedding server unreachable at {EMBED_SERVER_URL} ({e}), "
+                  f"embedding locally, retrying in {EMBED_SERVER_RETRY_SECONDS}s")
+        _server_down_at = time.monotonic()
+        return None
+
+    return np.frombuffer(body, dtype="float32").reshape(-1, dim)
+
+
+# ==================================================
+# LENGTH-BUCKETED BATCHING
+# ==================================================
+def _token_lengths(model, texts: List[str]) -> List[int]:
+    """Token count of each text after truncation to the model's max length"""
+    ids = model.tokenizer(
+        texts,
+        truncation=True,
+        max_length=model.max_seq_length
+    )["input_ids"]
+    return [len(x) for x in ids]
+
+
+def _token_batches(lengths: List[int], max_batch: int, token_budget: int) -> List[List[int]]:
+    """
+    Indices sorted by length (longest first), cut into batches whose
+    padded size (count * longest) stays under token_budget
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+
+    batches = []
+    current = []
+    for i in order:
+        # Longest text of the batch is its first one
+        longest = lengths[current[0]] if current else lengths[i]
+        if current and (len(current) >= max_batch or (len(current) + 1) * longest > token_budget):
+            batches.append(current)
+            current = []
+        current.append(i)
+
+    if current:
+        batches.append(current)
+    return batches
+
+
 # ==================================================
 # SAFE NORMALIZATION
 # ==================================================
@@ -58,15 +198,33 @@ def _safe_normalize(vectors: np.ndarray) -> np.ndarray:
 def embed(
     text: Union[str, List[str]],
     batch_size: int = 32,
-    normalize: bool = True
+    normalize: bool = True,
+    use_cache: bool = EMBED_CACHE_ENABLED,
+    mode: str = EMBED_MODE
 ) -> np.ndarray:
     """
     Generate embeddings for text or list of texts
     Optimized for cosine-based clustering
+    Normalized vectors are served from the content-hash cache when possible
+    Lists are batched by token length under EMBED_TOKEN_BUDGET, with
+    batch_size as the upper bound on texts per batch
+    In "client" mode the texts are sent to embed_server instead
     """
 
+    if mode == "client" and _server_available():
+        texts = [text] if isinstance(text, str) else list(text)
+        vectors = _embed_remote(texts, normalize)
+        if vectors is not None:
+            return vectors[0] if isinstance(text, str) else vectors
+
     model = get_model()
 
+    if use_cache and normalize:
+        if isinstance(text, str):
+            return _embed_cached([text], batch_size)[0]
+        if text:
+            return _embed_cached(list(text), batch_size)
+
     if isinstance(text, str):
         vec = model.encode(
             text,
@@ -80,14 +238,43 @@ def embed(
     if not text:
         return np.empty((0, model.get_sentence_embedding_dimension()))
 
-    vectors = model.encode(
-        text,
-        batch_size=batch_size,
-        show_progress_bar=False,
-        convert_to_numpy=True
-    )
+    texts = list(text)
+    start = time.perf_counter()
+    lengths = _token_lengths(model, texts)
+
+    vectors = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    for idx in _token_batches(lengths, batch_size, EMBED_TOKEN_BUDGET):
+        vectors[idx] = model.encode(
+            [texts[i] for i in idx],
+            batch_size=len(idx),
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+
+    with _throughput_lock:
+        _throughput["texts"] += len(texts)
+        _throughput["tokens"] += sum(lengths)
+        _throughput["seconds"] += time.perf_counter() - start
 
     if normalize:
         vectors = _safe_normalize(vectors)
 
     return vectors
+
+
+def _embed_cached(texts: List[str], batch_size: int) -> np.ndarray:
+    cache = get_cache()
+    cached = cache.get_many(texts)
+
+    missing = [i for i, v in enumerate(cached) if v is None]
+    if missing:
+        # Duplicates inside one call are embedded once
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        vectors = embed(unique, batch_size=batch_size, normalize=True, use_cache=False, mode="local")
+        cache.put_many(unique, vectors)
+
+        by_text = dict(zip(unique, vectors))
+        for i in missing:
+            cached[i] = by_text[texts[i]]
+
+    return np.vstack(cached).astype("float32", copy=False)
@@ -0,0 +1,163 @@
+"""
+Content-hash -> embedding cache.
+
+An in-memory LRU sits in front of a SQLite store (its own file, so it
+never contends with the news.db writer). Keys are sha1(model + text),
+so syndicated copies and re-crawls skip the model forward pass.
+The store is trimmed to EMBED_CACHE_MAX_ITEMS by least recent use; its
+row count is read once at startup and kept up to date by put / evict.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import EMBED_CACHE_PATH, EMBED_CACHE_MEMORY_ITEMS, EMBED_CACHE_MAX_ITEMS
+
+
+class EmbeddingCache:
+
+    def __init__(
+        self,
+        namespace: str,
+        path: str = EMBED_CACHE_PATH,
+        memory_items: int = EMBED_CACHE_MEMORY_ITEMS,
+        max_items: int = EMBED_CACHE_MAX_ITEMS
+    ):
+        self.namespace = namespace
+        self.memory_items = memory_items
+        self.max_items = max_items
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;").fetchone()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_embedding_cache_used
+                ON embedding_cache(last_used);
+        """)
+        self._conn.commit()
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    # ==================================================
+    # MEMORY LRU
+    # ==================================================
+    def _remember(self, key: str, vec: np.ndarray):
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # ==================================================
+    # API
+    # ==================================================
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for k in keys:
+                vec = self._memory.get(k)
+                if vec is not None:
+                    self._memory.move_to_end(k)
+                    found[k] = vec
+
+            missing = list({k for k in keys if k not in found})
+            now = time.time()
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for k, blob in rows:
+                    vec = np.frombuffer(blob, dtype="float32")
+                    found[k] = vec
+                    self._remember(k, vec)
+
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embedding_cache SET last_used = ? WHERE key IN ({placeholders})",
+                        [now, *chunk]
+                    )
+            self._conn.commit()
+
+            result = [found.get(k) for k in keys]
+            hits = sum(v is not None for v in result)
+            self.hits += hits
+            self.misses += len(result) - hits
+
+        return result
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        if not len(texts):
+            return
+
+        now = time.time()
+        rows = {}
+        with self._lock:
+            for text, vec in zip(texts, vectors):
+                k = self.key(text)
+                vec = np.asarray(vec, dtype="float32")
+                self._remember(k, vec)
+                rows[k] = (k, vec.tobytes(), now)
+
+            # Misses are almost always new keys: insert, and only rewrite
+            # when some were already stored (e.g. by another process)
+            before = self._conn.total_changes
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO embedding_cache (key, vector, last_used)
+                VALUES (?, ?, ?)
+            """, rows.values())
+            inserted = self._conn.total_changes - before
+            if inserted < len(rows):
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET vector = ?, last_used = ? WHERE key = ?",
+                    [(blob, used, k) for k, blob, used in rows.values()]
+                )
+            self._count += inserted
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        excess = self._count - self.max_items
+        if excess > 0:
+            deleted = self._conn.execute("""
+                DELETE FROM embedding_cache
+                WHERE key IN (
+                    SELECT key FROM embedding_cache
+                    ORDER BY last_used ASC
+                    LIMIT ?
+                )
+            """, (excess,)).rowcount
+            self._count -= deleted
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "memory_items": len(self._memory),
+        }
@@ -0,0 +1,156 @@
+"""
+Fast-path article extraction.
+
+Runs the per-publisher CSS selectors on selectolax (lexbor) or lxml
+instead of building a full BeautifulSoup tree. Output matches the
+BeautifulSoup extractors in crawler_utils, which stay as the fallback.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as FastHTMLParser
+        SELECTOLAX_AVAILABLE = True
+    except ImportError:
+        SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from config import EXTRACTOR_BACKEND
+
+# First matching selector wins, same order as the BeautifulSoup extractors
+SELECTORS: Dict[str, List[str]] = {
+    "VNExpress": ["article.fck_detail"],
+    "Tuổi Trẻ": ["div.detail-content"],
+    "Dân Trí": ["div.singular-content"],
+    "Thanh Niên": ["article", "div.content-detail"],
+    "VietnamNet": ["div.maincontent", "div.content-detail", "article"],
+}
+
+LINE_FILTERS: Dict[str, Callable[[str], bool]] = {
+    "VietnamNet": lambda line: "vietnamnet" not in line.lower(),
+}
+
+_SEP = "\x00"
+
+
+def _join_text(raw: str) -> str:
+    """Join text nodes like BeautifulSoup get_text(" ", strip=True)"""
+    return " ".join(t for t in (s.strip() for s in raw.split(_SEP)) if t)
+
+def _finish(source: str, paragraphs: List[str]) -> str:
+    lines = [p for p in paragraphs if p]
+    keep = LINE_FILTERS.get(source)
+    if keep:
+        lines = [line for line in lines if keep(line)]
+    return "\n".join(lines)
+
+# ==================================================
+# SELECTOLAX
+# ==================================================
+def _selectolax_content(source: str, html: str) -> str:
+    tree = FastHTMLParser(html)
+
+    node = None
+    for selector in SELECTORS[source]:
+        node = tree.css_first(selector)
+        if node is not None:
+            break
+    if node is None:
+        return ""
+
+    for fig in node.css("figure"):
+        fig.decompose()
+
+    return _finish(source, [
+        _join_text(p.text(deep=True, separator=_SEP, strip=False))
+        for p in node.css("p")
+    ])
+
+def _selectolax_description(html: str) -> Tuple[str, Optional[str]]:
+    tree = FastHTMLParser(html)
+    img = tree.css_first("img")
+    image = img.attributes.get("src") if img is not None else None
+
+    root = tree.body or tree.root
+    summary = _join_text(root.text(deep=True, separator=_SEP, strip=False)) if root is not None else ""
+    return summary, image
+
+# ==================================================
+# LXML
+# ==================================================
+def _css_to_xpath(selector: str) -> str:
+    """Translate the simple `tag` / `tag.class` selectors used above"""
+    tag, _, cls = selector.partition(".")
+    if not cls:
+        return f"//{tag}"
+    return f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+def _lxml_text(el) -> str:
+    return " ".join(t for t in (s.strip() for s in el.itertext()) if t)
+
+def _lxml_content(source: str, html: str) -> str:
+    tree = lxml.html.fromstring(html)
+
+    node = None
+    for selector in SELECTORS[source]:
+        found = tree.xpath(_css_to_xpath(selector))
+        if found:
+            node = found[0]
+            break
+    if node is None:
+        return ""
+
+    for fig in node.xpath(".//figure"):
+        fig.drop_tree()
+
+    return _finish(source, [_lxml_text(p) for p in node.iter("p")])
+
+def _lxml_description(html: str) -> Tuple[str, Optional[str]]:
+    tree = lxml.html.fromstring(html)
+    imgs = tree.xpath("//img")
+    image = imgs[0].get("src") if imgs else None
+    return _lxml_text(tree), image
+
+# ==================================================
+# DISPATCH
+# ==================================================
+def _resolve_backend(name: str) -> Optional[str]:
+    if name == "auto":
+        if SELECTOLAX_AVAILABLE:
+            return "selectolax"
+        if LXML_AVAILABLE:
+            return "lxml"
+        return None
+    if name == "selectolax" and SELECTOLAX_AVAILABLE:
+        return "selectolax"
+    if name == "lxml" and LXML_AVAILABLE:
+        return "lxml"
+    return None
+
+BACKEND = _resolve_backend(EXTRACTOR_BACKEND)
+
+_CONTENT = {"selectolax": _selectolax_content, "lxml": _lxml_content}
+_DESCRIPTION = {"selectolax": _selectolax_description, "lxml": _lxml_description}
+
+
+def extract_content(source: str, html: str, backend: Optional[str] = BACKEND) -> Optional[str]:
+    """Article text, or None when no fast backend applies (caller falls back)"""
+    if backend is None or source not in SELECTORS:
+        return None
+    return _CONTENT[backend](source, html)
+
+def parse_description(html: str, backend: Optional[str] = BACKEND) -> Optional[Tuple[str, Optional[str]]]:
+    """(summary, image) for an RSS description, None when no fast backend applies"""
+    if backend is None:
+        return None
+    if "<" not in html and "&" not in html:
+        return html.strip(), None
+    return _DESCRIPTION[backend](html)
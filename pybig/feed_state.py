@@ -0,0 +1,275 @@
+"""
+Persisted per-feed crawl state.
+
+- HTTP validators (ETag / Last-Modified) and a hash of the last feed
+  body, so unchanged feeds are skipped before parsing.
+- A high-water mark per (source, feed) plus the GUIDs seen within a
+  grace window below it, so known entries are dropped before any
+  article page is fetched, even right after a restart.
+
+New state is staged during a crawl and only written once the articles
+have been processed: a GUID is committed only after main.process_articles
+reports its article as stored (mark_stored), and a feed whose accepted
+entries were not all stored keeps its old validators, so its body is
+parsed again. A dropped or failed article is never hidden from the next
+cycle.
+"""
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from db import conn
+from config import FEED_WATERMARK_GRACE_HOURS
+
+_lock = threading.Lock()
+_validators: Optional[Dict[str, Dict]] = None
+_staged: Dict[str, Dict] = {}
+_unchanged = 0
+
+FeedKey = Tuple[str, str]  # (source, rss_url)
+
+_watermarks: Optional[Dict[FeedKey, datetime]] = None
+_seen: Optional[Dict[FeedKey, Dict[str, datetime]]] = None
+_staged_seen: Dict[FeedKey, Dict[str, datetime]] = {}
+# Accepted entries by article link, and those whose article was stored
+_accepted: Dict[str, Tuple[FeedKey, str]] = {}
+_stored_seen: Dict[FeedKey, Dict[str, datetime]] = {}
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()
+
+def _to_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime, naive inputs are assumed to be UTC already"""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+# ==================================================
+# VALIDATORS
+# ==================================================
+def _load_validators() -> Dict[str, Dict]:
+    global _validators
+
+    if _validators is None:
+        rows = conn.execute("""
+            SELECT rss_url, etag, last_modified, content_hash
+            FROM feed_state
+        """).fetchall()
+        _validators = {
+            url: {"etag": etag, "last_modified": lm, "content_hash": h}
+            for url, etag, lm, h in rows
+        }
+    return _validators
+
+def conditional_headers(rss_url: str) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers for a feed"""
+    with _lock:
+        state = _load_validators().get(rss_url)
+
+    headers = {}
+    if state:
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+def check_feed(rss_url: str, status: int, headers, body: Optional[bytes]) -> bool:
+    """
+    Record a feed response. Returns True if the body must be parsed,
+    False on 304 Not Modified or when the body hash is unchanged.
+    """
+    global _unchanged
+
+    if status == 304 or body is None:
+        with _lock:
+            _unchanged += 1
+        return False
+
+    digest = content_hash(body)
+
+    with _lock:
+        state = _load_validators().get(rss_url)
+        _staged[rss_url] = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_hash": digest,
+        }
+
+        if state and state["content_hash"] == digest:
+            _unchanged += 1
+            return False
+
+    return True
+
+# ==================================================
+# WATERMARKS
+# ==================================================
+def _load_watermarks():
+    global _watermarks, _seen
+
+    if _watermarks is not None:
+        return
+
+    _watermarks = {}
+    for source, rss_url, last_published_at in conn.execute("""
+        SELECT source, rss_url, last_published_at
+        FROM feed_watermarks
+    """).fetchall():
+        if last_published_at:
+            _watermarks[(source, rss_url)] = datetime.strptime(last_published_at, TIME_FORMAT)
+
+    _seen = {}
+    for source, rss_url, guid, published_at in conn.execute("""
+        SELECT source, rss_url, guid, published_at
+        FROM feed_seen_guids
+    """).fetchall():
+        _seen.setdefault((source, rss_url), {})[guid] = datetime.strptime(published_at, TIME_FORMAT)
+
+def is_new_entry(source: str, rss_url: str, entry: Dict) -> bool:
+    """
+    Entry filter applied before any article fetch.
+    Accepted entries are held for this crawl; they are only committed as
+    seen once mark_stored confirms their article.
+    """
+    key = (source, rss_url)
+    guid = entry["guid"]
+    published = _to_utc(entry.get("published_dt"))
+
+    with _lock:
+        _load_watermarks()
+
+        if guid in _seen.get(key, ()):
+            return False
+
+        staged = _staged_seen.setdefault(key, {})
+        if guid in staged:
+            return False
+
+        watermark = _watermarks.get(key)
+        if (
+            watermark is not None
+            and published is not None
+            and published < watermark - timedelta(hours=FEED_WATERMARK_GRACE_HOURS)
+        ):
+            return False
+
+        staged[guid] = published or datetime.utcnow()
+        _accepted[entry["link"]] = (key, guid)
+
+    return True
+
+def mark_stored(urls: Iterable[str]):
+    """Articles now in the news table: their entries can be committed as seen"""
+    with _lock:
+        for url in urls:
+            accepted = _accepted.get(url)
+            if accepted is None:
+                continue
+            key, guid = accepted
+            _stored_seen.setdefault(key, {})[guid] = _staged_seen[key][guid]
+
+# ==================================================
+# STAGING
+# ==================================================
+def discard_staged():
+    """Start a new crawl: forget state staged by a failed cycle"""
+    global _unchanged
+
+    with _lock:
+        _staged.clear()
+        _staged_seen.clear()
+        _accepted.clear()
+        _stored_seen.clear()
+        _unchanged = 0
+
+def pop_unchanged_count() -> int:
+    global _unchanged
+
+    with _lock:
+        count, _unchanged = _unchanged, 0
+    return count
+
+def _commit_validators():
+    # Feeds with an accepted entry that was not stored get parsed again
+    for key, guid in _accepted.values():
+        if guid not in _stored_seen.get(key, ()):
+            _staged.pop(key[1], None)
+
+    if not _staged:
+        return
+
+    conn.executemany("""
+        INSERT INTO feed_state (rss_url, etag, last_modified, content_hash, checked_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(rss_url) DO UPDATE SET
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            content_hash = excluded.content_hash,
+            checked_at = excluded.checked_at
+    """, [
+        (url, s["etag"], s["last_modified"], s["content_hash"])
+        for url, s in _staged.items()
+    ])
+
+    _load_validators().update(_staged)
+    _staged.clear()
+
+def _commit_watermarks():
+    if not _stored_seen:
+        return
+
+    _load_watermarks()
+
+    for (source, rss_url), guids in _stored_seen.items():
+        if not guids:
+            continue
+
+        key = (source, rss_url)
+        watermark = max([_watermarks.get(key, datetime.min), *guids.values()])
+        horizon = watermark - timedelta(hours=FEED_WATERMARK_GRACE_HOURS)
+
+        conn.executemany("""
+            INSERT OR IGNORE INTO feed_seen_guids (source, rss_url, guid, published_at)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (source, rss_url, guid, published.strftime(TIME_FORMAT))
+            for guid, published in guids.items()
+        ])
+
+        conn.execute("""
+            INSERT INTO feed_watermarks (source, rss_url, last_published_at, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source, rss_url) DO UPDATE SET
+                last_published_at = excluded.last_published_at,
+                updated_at = excluded.updated_at
+        """, (source, rss_url, watermark.strftime(TIME_FORMAT)))
+
+        # GUIDs below the grace window can never pass the age check again
+        conn.execute("""
+            DELETE FROM feed_seen_guids
+            WHERE source = ? AND rss_url = ? AND published_at < ?
+        """, (source, rss_url, horizon.strftime(TIME_FORMAT)))
+
+        _watermarks[key] = watermark
+        seen = _seen.setdefault(key, {})
+        seen.update(guids)
+        _seen[key] = {g: p for g, p in seen.items() if p >= horizon}
+
+    _stored_seen.clear()
+
+def commit_staged():
+    """Persist validators, watermarks and seen GUIDs staged by the last crawl"""
+    with _lock:
+        if not _staged and not _staged_seen:
+            return
+
+        _commit_validators()
+        _commit_watermarks()
+        _staged_seen.clear()
+        _accepted.clear()
+        conn.commit()
@@ -0,0 +1,244 @@
+"""
+Per-host protection for publisher fetches.
+
+- Token bucket rate limit per host
+- Jittered exponential backoff between retries (CRAWL_RETRY_ATTEMPTS)
+- Circuit breaker that skips a host after repeated failures and lets a
+  single probe through once the cooldown has passed
+
+Shared by the requests-based fetchers and the asyncio engine: both hand
+one GET to host_guard.get / get_async, which own the retry policy
+(RETRYABLE_STATUS, attempt count, backoff).
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple, Type, TypeVar
+from urllib.parse import urlsplit
+
+from config import (
+    HOST_RATE_PER_SEC,
+    HOST_BURST,
+    CRAWL_RETRY_ATTEMPTS,
+    CRAWL_BACKOFF_BASE,
+    CRAWL_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_COOLDOWN,
+)
+
+
+T = TypeVar("T")
+
+# Worth another attempt (and count against the host's breaker)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostUnavailable(Exception):
+    """Raised when the circuit breaker for a host is open"""
+
+class RetryableStatus(Exception):
+    """Raised by check_status for a status in RETRYABLE_STATUS"""
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: base * 2^attempt, scaled by [0.5, 1.5)"""
+    delay = min(CRAWL_BACKOFF_MAX, CRAWL_BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.5)
+
+def check_status(status: int, url: str):
+    if status in RETRYABLE_STATUS:
+        raise RetryableStatus(f"{status} for {url}")
+
+# ==================================================
+# TOKEN BUCKET
+# ==================================================
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token, returns how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+# ==================================================
+# CIRCUIT BREAKER
+# ==================================================
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+# ==================================================
+# REGISTRY
+# ==================================================
+class HostGuard:
+    """Rate limiter + breaker per host, with per-cycle counters for the log"""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._skipped: Dict[str, int] = {}
+        self._failed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host: str):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(HOST_RATE_PER_SEC, HOST_BURST)
+                self._breakers[host] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN)
+            return self._buckets[host], self._breakers[host]
+
+    def allow(self, url: str) -> bool:
+        host = host_of(url)
+        _, breaker = self._get(host)
+        if breaker.allow():
+            return True
+        with self._lock:
+            self._skipped[host] = self._skipped.get(host, 0) + 1
+        return False
+
+    def reserve(self, url: str) -> float:
+        bucket, _ = self._get(host_of(url))
+        return bucket.reserve()
+
+    def record(self, url: str, ok: bool):
+        host = host_of(url)
+        _, breaker = self._get(host)
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+            with self._lock:
+                self._failed[host] = self._failed.get(host, 0) + 1
+
+    # ==================================================
+    # RETRY POLICY
+    # ==================================================
+    def _admit(self, url: str) -> float:
+        """Breaker check, then the wait for a rate limit token"""
+        if not self.allow(url):
+            raise HostUnavailable(f"circuit open for {host_of(url)}")
+        return self.reserve(url)
+
+    def get(self, url: str, send: Callable[[], T], errors: Tuple[Type[Exception], ...]) -> T:
+        """
+        Run send() (one GET) up to CRAWL_RETRY_ATTEMPTS + 1 times, retrying
+        errors and RetryableStatus with jittered backoff.
+        """
+        for attempt in range(CRAWL_RETRY_ATTEMPTS + 1):
+            delay = self._admit(url)
+            if delay:
+                time.sleep(delay)
+
+            try:
+                result = send()
+            except (*errors, RetryableStatus):
+                self.record(url, ok=False)
+                if attempt >= CRAWL_RETRY_ATTEMPTS:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            self.record(url, ok=True)
+            return result
+
+    async def get_async(
+        self,
+        url: str,
+        send: Callable[[], Awaitable[T]],
+        errors: Tuple[Type[Exception], ...]
+    ) -> T:
+        """get() for coroutines: the waits are asyncio.sleep"""
+        for attempt in range(CRAWL_RETRY_ATTEMPTS + 1):
+            delay = self._admit(url)
+            if delay:
+                await asyncio.sleep(delay)
+
+            try:
+                result = await send()
+            except (*errors, RetryableStatus):
+                self.record(url, ok=False)
+                if attempt >= CRAWL_RETRY_ATTEMPTS:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            self.record(url, ok=True)
+            return result
+
+    def report(self) -> List[str]:
+        """Hosts with failures, skips or a non-closed breaker since the last report"""
+        lines = []
+        with self._lock:
+            hosts = sorted(set(self._skipped) | set(self._failed) | {
+                h for h, b in self._breakers.items() if b.state != CircuitBreaker.CLOSED
+            })
+            for host in hosts:
+                lines.append(
+                    f"{host}: breaker={self._breakers[host].state} "
+                    f"failures={self._failed.get(host, 0)} skipped={self._skipped.get(host, 0)}"
+                )
+            self._skipped.clear()
+            self._failed.clear()
+        return lines
+
+    def log_cycle(self):
+        for line in self.report():
+            print(f"  [hosts] {line}")
+
+
+host_guard = HostGuard()
@@ -1,54 +1,153 @@
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
 from db import cursor, conn
-from config import HOT_DECAY_HOURS
+from cluster_stats import bucket_of, window_edge, prune
+from config import HOT_DECAY_HOURS, HOT_READS_WINDOW_HOURS, HOT_SCORE_FLOOR, HOT_SCORE_MIN_DELTA
 
 # =========================
-# SHARED SQL FORMULA
+# SCORING MODEL
 # =========================
-HOT_SCORE_SQL = f"""
-    (
-        -- Base score by cluster size
-        CASE
-            WHEN size = 1 THEN 0.3
-            WHEN size = 2 THEN 1.0
-            ELSE LOG(size + 1) * 2.5
-        END
-    )
-    *
-    -- Time decay (hours)
-    EXP(
-        -(
-            (julianday('now') - julianday(COALESCE(last_update, created_at)))
-            * 24.0
-            / ?
-        )
+# The one hot score of the project; the Next.js routes only bump
+# cluster_stats and the next pass rescores the touched clusters:
+#
+#   max(0, base(size) + 0.4 log(1 + views) + 0.6 log(1 + reads 24h)
+#          - min(1.5, log(1 + reports) * (1 - exp(-views / 50))))
+#   * exp(-hours since last update / HOT_DECAY_HOURS)
+#   * (1 + min(0.1 * articles published in HOT_DECAY_HOURS, 1))
+def compute_hot_scores(
+    sizes: np.ndarray,
+    age_hours: np.ndarray,
+    recent: np.ndarray,
+    views: np.ndarray = 0,
+    reads: np.ndarray = 0,
+    reports: np.ndarray = 0
+) -> np.ndarray:
+    """Score arrays of clusters: size + engagement - report penalty, time decay, recent-activity boost"""
+    sizes = np.asarray(sizes, dtype=np.float64)
+    views = np.asarray(views, dtype=np.float64)
+
+    base = np.where(
+        sizes == 1, 0.3,
+        np.where(sizes == 2, 1.0, np.log(sizes + 1) * 2.5)
     )
-    *
-    -- Recent activity boost (clamped)
-    (
-        1.0 + MIN(
-            COALESCE((
-                SELECT COUNT(*) * 0.1
-                FROM news n
-                WHERE n.cluster_id = clusters.id
-                AND (julianday('now') - julianday(n.published_at)) * 24.0 <= ?
-            ), 0),
-            1.0
-        )
+    engagement = 0.4 * np.log1p(views) + 0.6 * np.log1p(np.asarray(reads, dtype=np.float64))
+    penalty = np.minimum(
+        1.5,
+        np.log1p(np.asarray(reports, dtype=np.float64)) * (1 - np.exp(-views / 50))
     )
-"""
-def update_hot_scores():
+
+    decay = np.exp(-np.asarray(age_hours, dtype=np.float64) / HOT_DECAY_HOURS)
+    boost = 1.0 + np.minimum(np.asarray(recent, dtype=np.float64) * 0.1, 1.0)
+    return np.maximum(0.0, base + engagement - penalty) * decay * boost
+
+def _stamp(epoch: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+def _fetch(where: str, params: Tuple, recent_where: str = "", recent_params: Tuple = ()) -> List[Tuple]:
+    """
+    (id, size, hot_score, last activity epoch, recent articles, views,
+    recent reads, reports) in one grouped query over cluster_stats.
+
+    The oldest hourly bucket of each window only partly overlaps it: recent
+    articles in that hour are counted exactly from news (published_at
+    index, one hour of rows), reads in it pro rata since read_logs has no
+    time index.
+    """
+    recent_start = time.time() - HOT_DECAY_HOURS * 3600
+    recent_from = bucket_of(recent_start)
+    reads_from, reads_share = window_edge(HOT_READS_WINDOW_HOURS)
+
     cursor.execute(f"""
-        UPDATE clusters
-        SET hot_score = {HOT_SCORE_SQL}
-    """, (HOT_DECAY_HOURS, HOT_DECAY_HOURS))
+        SELECT c.id, c.size, c.hot_score,
+               CAST(strftime('%s', COALESCE(c.last_update, c.created_at)) AS REAL),
+               COALESCE(r.recent, 0) + COALESCE(e.recent, 0),
+               COALESCE(s.views, 0),
+               COALESCE(r.reads, 0),
+               COALESCE(s.reports, 0)
+        FROM clusters c
+        LEFT JOIN cluster_stats s ON s.cluster_id = c.id
+        LEFT JOIN (
+            SELECT cluster_id,
+                   SUM(CASE WHEN bucket > ? THEN articles ELSE 0 END) AS recent,
+                   SUM(CASE WHEN bucket > ? THEN reads WHEN bucket = ? THEN reads * ? ELSE 0 END) AS reads
+            FROM cluster_stats_hourly
+            WHERE bucket >= ?
+              {recent_where}
+            GROUP BY cluster_id
+        ) r ON r.cluster_id = c.id
+        LEFT JOIN (
+            SELECT cluster_id, COUNT(*) AS recent
+            FROM news
+            WHERE published_at >= ?
+              AND published_at < ?
+              {recent_where}
+            GROUP BY cluster_id
+        ) e ON e.cluster_id = c.id
+        WHERE {where}
+    """, (
+        recent_from, reads_from, reads_from, reads_share,
+        min(recent_from, reads_from), *recent_params,
+        _stamp(recent_start), _stamp((recent_from + 1) * 3600), *recent_params,
+        *params
+    ))
+    return cursor.fetchall()
 
+def _write(rows: List[Tuple], force: bool = False) -> int:
+    """Score the fetched rows, write back those that moved. Returns rows written."""
+    if not rows:
+        return 0
+
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    sizes = np.array([r[1] for r in rows], dtype=np.float64)
+    old = np.array([r[2] for r in rows], dtype=np.float64)
+    last = np.array([r[3] if r[3] is not None else 0.0 for r in rows], dtype=np.float64)
+    recent, views, reads, reports = (
+        np.array([r[k] for r in rows], dtype=np.float64) for k in range(4, 8)
+    )
+
+    scores = compute_hot_scores(sizes, (time.time() - last) / 3600.0, recent, views, reads, reports)
+    scores[scores < HOT_SCORE_FLOOR] = 0.0
+
+    changed = np.ones(len(ids), dtype=bool) if force else np.abs(scores - old) > HOT_SCORE_MIN_DELTA
+    cursor.executemany(
+        "UPDATE clusters SET hot_score = ? WHERE id = ?",
+        zip(scores[changed].tolist(), ids[changed].tolist())
+    )
+    return int(changed.sum())
+
+def update_hot_scores() -> int:
+    """
+    Refresh the scores that can still change: clusters with a score above
+    0, updated within HOT_DECAY_HOURS or with recent articles, views,
+    reads or reports. Clusters that decayed to 0 are skipped until they
+    get new activity.
+    """
+    cutoff = (datetime.utcnow() - timedelta(hours=HOT_DECAY_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+    rows = _fetch(
+        "c.hot_score > 0 OR c.last_update >= ? OR r.cluster_id IS NOT NULL",
+        (cutoff,)
+    )
+    written = _write(rows)
+    prune()
     conn.commit()
+    return written
 
 def update_cluster_hot_score(cluster_id: int):
-    cursor.execute(f"""
-        UPDATE clusters
-        SET hot_score = {HOT_SCORE_SQL}
-        WHERE id = ?
-    """, (HOT_DECAY_HOURS, HOT_DECAY_HOURS, cluster_id))
-
+    update_cluster_hot_scores([cluster_id])
     conn.commit()
+
+def update_cluster_hot_scores(cluster_ids: Iterable[int]):
+    """Recompute several clusters, caller commits"""
+    cluster_ids = list(cluster_ids)
+    for i in range(0, len(cluster_ids), 500):
+        chunk = cluster_ids[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = _fetch(
+            f"c.id IN ({placeholders})", tuple(chunk),
+            f"AND cluster_id IN ({placeholders})", tuple(chunk)
+        )
+        _write(rows, force=True)
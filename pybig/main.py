@@ -1,67 +1,64 @@
 import time
-from datetime import datetime
-from db import init_db, cursor, conn, vec_to_blob
-from embedder import embed
+from db import init_db, cursor, conn, vec_to_blob, get_category_id, insert_news_bulk
+from embedder import embed, cache_stats, throughput_stats
 import numpy as np
-from clustering import hybrid_cluster_articles, recluster_category
+from clustering import hybrid_cluster_articles, incremental_recluster_category
+from parallel_recluster import recluster_categories
 from hot_score import update_hot_scores
-from rss_bootstrap import bootstrap_crawl
-from realtime_stream import realtime_crawl
-from config import BATCH_INTERVAL, RECLUSTER_INTERVAL, EMBED_BATCH_SIZE
-
-def get_or_create_category(cat):
-    cursor.execute(
-        "SELECT id FROM categories WHERE slug = ?",
-        (cat["slug"],)
-    )
-    row = cursor.fetchone()
-    if row:
-        return row[0]
-
-    cursor.execute(
-        "INSERT INTO categories (name, slug) VALUES (?, ?)",
-        (cat["name"], cat["slug"])
-    )
-    conn.commit()
-    return cursor.lastrowid
+from rankings import update_rankings, backfill_representatives
+from view_ingest import drain_all as drain_view_events
+from rss_bootstrap import bootstrap_stream
+from realtime_stream import crawl_stream
+from pipeline import micro_batches
+import feed_state
+import cluster_stats
+from url_index import url_index, normalize_url
+from config import BATCH_INTERVAL, RECLUSTER_INTERVAL, RECLUSTER_MODE, EMBED_BATCH_SIZE
 
 def check_existing_urls(urls):
+    """URLs already stored, matched as-is or by their normalized form"""
     if not urls:
         return set()
     
-    placeholders = ','.join('?' * len(urls))
+    candidates = list({u for url in urls for u in (url, normalize_url(url))})
+    placeholders = ','.join('?' * len(candidates))
     cursor.execute(
         f"SELECT url FROM news WHERE url IN ({placeholders})",
-        urls
+        candidates
     )
-    return {row[0] for row in cursor.fetchall()}
+    stored = {row[0] for row in cursor.fetchall()}
+    return {url for url in urls if url in stored or normalize_url(url) in stored}
 
 def process_articles(articles):
+    """Embed, insert and cluster a batch, returns the URLs now stored in news"""
     if not articles:
-        return
+        return []
 
     existing_urls = check_existing_urls([art.get("url", "") for art in articles if art.get("url")])
     
     if existing_urls:
         print(f"Skipped {len(existing_urls)} duplicates")
+        url_index.add_many(existing_urls)
     
     articles = [art for art in articles if art.get("url", "") not in existing_urls]
     
+    stored = list(existing_urls)
     if not articles:
         print("All articles already in database")
-        return
+        return stored
     
     print(f"Processing {len(articles)} articles...")
 
     articles_by_category = {}
     for art in articles:
         try:
-            category_id = get_or_create_category(art["category"])
+            category_id = get_category_id(art["category"])
             if category_id not in articles_by_category:
                 articles_by_category[category_id] = []
             articles_by_category[category_id].append(art)
         except Exception as e:
             print(f"\nError processing category: {e}")
+    conn.commit()
 
     for category_id, cat_articles in articles_by_category.items():
         print(f"  Processing {len(cat_articles)} articles in category {category_id}...")
@@ -83,61 +80,43 @@ def process_articles(articles):
                     embeddings.append(vec)
                 except:
                     embeddings.append(None)
+
+        stats = cache_stats()
+        if stats:
+            print(f"  Embedding cache: {stats['hit_rate']:.1%} hit rate ({stats['hits']} hits / {stats['misses']} misses)")
+        speed = throughput_stats()
+        if speed["tokens"]:
+            print(f"  Embedding speed: {speed['tokens_per_sec']:.0f} tokens/sec ({speed['texts']} texts encoded)")
         
         print(f"  Inserting {len(cat_articles)} articles into database...")
+        kept = [(art, vec) for art, vec in zip(cat_articles, embeddings) if vec is not None]
+        rows = [
+            (
+                art.get("url", ""),
+                art["title"],
+                art["content"],
+                art["summary"],
+                art["image_url"],
+                art["source"],
+                art["published_at"],
+                category_id,
+                vec_to_blob(vec)
+            )
+            for art, vec in kept
+        ]
+
         article_data = []
-        
-        insert_data = []
-        for i, art in enumerate(cat_articles):
-            if embeddings[i] is not None:
-                insert_data.append((
-                    art.get("url", ""),
-                    art["title"],
-                    art["content"],
-                    art["summary"],
-                    art["image_url"],
-                    art["source"],
-                    art["published_at"],
-                    category_id,
-                    vec_to_blob(embeddings[i])
-                ))
-        
-        if insert_data:
-            for i, (art, data_tuple) in enumerate(zip(cat_articles, insert_data)):
-                if embeddings[i] is not None:
-                    try:
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO news (
-                                url,
-                                title,
-                                content,
-                                summary,
-                                image_url,
-                                source,
-                                published_at,
-                                category_id,
-                                embedding
-                            )
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, data_tuple)
-                        
-                        news_id = cursor.lastrowid
-                        if news_id:
-                            article_data.append({
-                                "id": news_id,
-                                "embedding": embeddings[i]
-                            })
-                    except Exception as e:
-                        cursor.execute("SELECT id FROM news WHERE title = ? AND category_id = ?", 
-                                     (art["title"], category_id))
-                        row = cursor.fetchone()
-                        if row:
-                            article_data.append({
-                                "id": row[0],
-                                "embedding": embeddings[i]
-                            })
-            
-            conn.commit()
+        try:
+            news_ids = insert_news_bulk(rows)
+            article_data = [
+                {"id": news_id, "embedding": vec}
+                for news_id, (art, vec) in zip(news_ids, kept)
+                if news_id is not None
+            ]
+            url_index.add_many(art.get("url", "") for art, _ in kept)
+            stored.extend(art.get("url", "") for art, _ in kept)
+        except Exception as e:
+            print(f"  ✗ Insert error: {e}")
         
         if not article_data:
             print(f"  No new articles to cluster in category {category_id}")
@@ -161,15 +140,43 @@ def process_articles(articles):
                 print(f"  ✗ Error in fallback clustering: {e2}")
 
     print(f"\n✓ Processed {len(articles)} articles successfully\n")
+    return stored
+
+def ingest_stream(articles) -> int:
+    """
+    Streaming ingest: crawl -> dedup -> embed -> insert -> assign,
+    one micro-batch at a time, so articles are visible within seconds
+    and only a bounded number of bodies is held in memory
+    """
+    total = 0
+    batches = micro_batches(articles)
+    try:
+        for batch in batches:
+            total += len(batch)
+            # Only stored articles get their feed entries committed as seen
+            feed_state.mark_stored(process_articles(batch))
+    finally:
+        # On an error this stops the crawl threads instead of leaving them blocked
+        batches.close()
+    return total
 
 def main():   
     print("Initializing database...")
     init_db()
 
-    bootstrap_articles = bootstrap_crawl()
-    process_articles(bootstrap_articles)
+    backfilled = cluster_stats.backfill()
+    represented = backfill_representatives()
+    conn.commit()
+    if backfilled:
+        print(f"Counted cluster_stats for {backfilled} clusters")
+    if represented:
+        print(f"Picked representative articles for {represented} clusters")
+
+    print(f"Warmed URL index with {url_index.warm()} stored URLs")
 
-    last_seen_time = datetime.utcnow()
+    bootstrap_count = ingest_stream(bootstrap_stream())
+    feed_state.commit_staged()
+    print(f"\n✓ Bootstrap ingested {bootstrap_count} articles\n")
 
     print(f"\n[REALTIME] Checking every {BATCH_INTERVAL}s\n")
     print(f"[RECLUSTER] Will recluster every {RECLUSTER_INTERVAL}s\n")
@@ -184,31 +191,42 @@ def main():
             current_timestamp = time.time()
             
             print(f"[{current_time}] Cycle #{cycle} - Checking RSS feeds...")
-            new_articles = realtime_crawl(last_seen_time)
+            new_count = ingest_stream(crawl_stream())
+            feed_state.commit_staged()
+            if new_count:
+                print(f"  Found {new_count} new articles")
 
-            if new_articles:
-                process_articles(new_articles)
-                last_seen_time = datetime.utcnow()
+            views = drain_view_events()
+            if views:
+                print(f"  Ingested {views} view events")
 
             print(f"[{current_time}] Updating hot scores...")
             update_hot_scores()
+            ranked = update_rankings()
+            print(f"  ✓ Rankings: {ranked.get('global', 0)} global, {ranked.get('today', 0)} today, "
+                  f"{ranked.get('trending', 0)} trending")
             
             if current_timestamp - last_recluster_time >= RECLUSTER_INTERVAL:
                 print(f"[{current_time}] ⚡ Starting periodic reclustering with optimized algorithm...")
                 recluster_start = time.time()
                 try:
-                    cursor.execute("SELECT id FROM categories")
-                    categories = cursor.fetchall()
-                    
                     total_clusters = 0
                     total_articles = 0
                     
-                    for (category_id,) in categories:
-                        print(f"  Reclustering category {category_id}...")
-                        stats = recluster_category(category_id)
+                    if RECLUSTER_MODE == "incremental":
+                        # Only categories with clusters touched since the last pass
+                        cursor.execute("SELECT DISTINCT category_id FROM cluster_dirty")
+                        results = {}
+                        for (category_id,) in cursor.fetchall():
+                            print(f"  Reclustering category {category_id}...")
+                            results[category_id] = incremental_recluster_category(category_id)
+                    else:
+                        cursor.execute("SELECT id FROM categories")
+                        results = recluster_categories([r[0] for r in cursor.fetchall()])
+                    
+                    for stats in results.values():
                         total_clusters += stats.get('clusters_created', 0)
                         total_articles += stats.get('articles', 0)
-                        print(f"  ✓ Created {stats.get('clusters_created', 0)} clusters for {stats.get('articles', 0)} articles")
                     
                     recluster_time = time.time() - recluster_start
                     print(f"[{current_time}] ✓ Reclustering completed in {recluster_time:.2f}s")
@@ -0,0 +1,256 @@
+"""
+ONNX Runtime backend for the sentence embedding models (CPU).
+
+The transformer of a SentenceTransformer model is exported once to
+ONNX (optionally with dynamic int8 quantization) under ONNX_CACHE_DIR,
+next to its tokenizer and pooling settings. At runtime only
+onnxruntime and the tokenizer are needed; pooling runs in NumPy.
+
+Each model file is compared with the torch model on PARITY_TEXTS the
+first time it loads; an export whose mean cosine is below
+ONNX_PARITY_MIN_COSINE refuses to load. `python onnx_backend.py [model]
+[--no-quantize]` re-runs the check and exits 1 on failure.
+"""
+import json
+import os
+import sys
+from typing import List, Union
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+from config import ONNX_CACHE_DIR, ONNX_QUANTIZE, ONNX_THREADS, ONNX_PARITY_MIN_COSINE
+
+META_FILE = "embedder_meta.json"
+
+PARITY_TEXTS = [
+    "Giá xăng dầu đồng loạt giảm từ 15h chiều nay",
+    "Đội tuyển Việt Nam thắng Thái Lan 2-1 tại chung kết AFF Cup",
+    "Ngân hàng Nhà nước giữ nguyên lãi suất điều hành trong quý IV",
+    "Mưa lớn kéo dài gây ngập nhiều tuyến phố ở TP.HCM",
+    "Bộ Giáo dục công bố phương án thi tốt nghiệp THPT năm tới",
+    "Apple ra mắt iPhone mới với chip nhanh hơn và pin lâu hơn",
+    "Thủ tướng chỉ đạo đẩy nhanh tiến độ cao tốc Bắc - Nam",
+    "Giá vàng miếng SJC tăng lên mức cao kỷ lục",
+]
+
+
+class ParityError(RuntimeError):
+    """The exported model drifted from the torch model beyond ONNX_PARITY_MIN_COSINE"""
+
+
+def model_dir(model_name: str, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, model_name.replace("/", "__"))
+
+# ==================================================
+# EXPORT
+# ==================================================
+def export_model(model_name: str, out_dir: str, quantize: bool = ONNX_QUANTIZE) -> str:
+    """
+    Export a SentenceTransformer model to ONNX.
+    Needs torch + sentence-transformers, only run once per model.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"⚙ Exporting {model_name} to ONNX...")
+    os.makedirs(out_dir, exist_ok=True)
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0]
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+
+    pooling = "mean"
+    if len(st) > 1 and hasattr(st[1], "get_config_dict"):
+        cfg = st[1].get_config_dict()
+        if cfg.get("pooling_mode_cls_token"):
+            pooling = "cls"
+
+    sample = tokenizer(["xin chào"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "seq"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(auto_model),
+            tuple(sample[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    model_file = "model.onnx"
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(
+            fp32_path,
+            os.path.join(out_dir, "model_int8.onnx"),
+            weight_type=QuantType.QInt8
+        )
+        model_file = "model_int8.onnx"
+
+    tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "model_file": model_file,
+            "input_names": input_names,
+            "pooling": pooling,
+            "max_seq_length": st.max_seq_length,
+            "dimension": st.get_sentence_embedding_dimension(),
+        }, f, indent=2)
+
+    print(f"✓ Exported {model_name} -> {os.path.join(out_dir, model_file)}")
+    return out_dir
+
+# ==================================================
+# ENCODER
+# ==================================================
+class OnnxEncoder:
+    """The subset of the SentenceTransformer API used by embedder"""
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = ONNX_QUANTIZE,
+        threads: int = ONNX_THREADS,
+        cache_dir: str = ONNX_CACHE_DIR
+    ):
+        if not ONNX_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+
+        from transformers import AutoTokenizer
+
+        path = model_dir(model_name, cache_dir)
+        meta_path = os.path.join(path, META_FILE)
+
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        if meta is None or (quantize and meta["model_file"] != "model_int8.onnx"):
+            export_model(model_name, path, quantize)
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+
+        model_file = meta["model_file"] if quantize else "model.onnx"
+        self.path = path
+        self.model_file = model_file
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            os.path.join(path, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model_name = model_name
+        self.quantized = model_file == "model_int8.onnx"
+        self.input_names = meta["input_names"]
+        self.pooling = meta["pooling"]
+        self.max_seq_length = meta["max_seq_length"]
+        self.dimension = meta["dimension"]
+
+        parity = meta.get("parity", {}).get(model_file)
+        if parity is None:
+            parity = measure_parity(self)
+            meta.setdefault("parity", {})[model_file] = parity
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+        if parity < ONNX_PARITY_MIN_COSINE:
+            raise ParityError(
+                f"{os.path.join(path, model_file)} drifted from {model_name}: "
+                f"mean cosine {parity:.5f} < {ONNX_PARITY_MIN_COSINE}, delete {path} to re-export"
+            )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        if self.pooling == "cls":
+            return hidden[:, 0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True
+    ) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self._encode_batch([sentences])[0]
+
+        if not sentences:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        # Sort by length so each batch pads to similar sizes
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        out = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for i in range(0, len(sentences), batch_size):
+            idx = order[i:i + batch_size]
+            out[idx] = self._encode_batch([sentences[j] for j in idx])
+        return out
+
+# ==================================================
+# PARITY
+# ==================================================
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+def measure_parity(encoder: OnnxEncoder, texts: List[str] = PARITY_TEXTS) -> float:
+    """Mean cosine between the ONNX and torch vectors of texts"""
+    from sentence_transformers import SentenceTransformer
+
+    print(f"⚙ Checking {encoder.model_file} of {encoder.model_name} against torch...")
+    torch_model = SentenceTransformer(encoder.model_name, device="cpu")
+    ref = _normalize(torch_model.encode(texts, convert_to_numpy=True))
+    got = _normalize(encoder.encode(texts))
+    return float((ref * got).sum(axis=1).mean())
+
+
+if __name__ == "__main__":
+    from embedder import DEFAULT_MODEL
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    encoder = OnnxEncoder(args[0] if args else DEFAULT_MODEL, quantize="--no-quantize" not in sys.argv)
+    parity = measure_parity(encoder)
+    if parity < ONNX_PARITY_MIN_COSINE:
+        print(f"✗ Parity check failed: mean cosine {parity:.5f} < {ONNX_PARITY_MIN_COSINE}")
+        sys.exit(1)
+    print(f"✓ Parity check passed: mean cosine {parity:.5f} >= {ONNX_PARITY_MIN_COSINE}")
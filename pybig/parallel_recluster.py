@@ -0,0 +1,124 @@
+"""
+Parallel full recluster.
+
+Categories are independent, so their clustering (PCA, HDBSCAN, NER
+keywords) runs in a ProcessPoolExecutor, one category per job. The
+parent reads each category's embeddings from SQLite into a raw float32
+file (ids and texts into files next to it) and submits its job right
+away, so workers start while later categories are still being dumped.
+The worker maps the file with np.memmap instead of receiving a pickled
+matrix, and walks it RECLUSTER_CHUNK_SIZE rows at a time.
+
+Workers never touch the database: they return the groups (centroid +
+member ids) and the parent, the only writer, swaps them in with
+clustering.apply_recluster as results come back.
+"""
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import RECLUSTER_WORKERS, RECLUSTER_CHUNK_SIZE
+from clustering import load_recluster_chunks, cluster_chunks, apply_recluster
+
+
+# ==================================================
+# WORKER (runs in a child process, must be picklable)
+# ==================================================
+def cluster_category_file(category_id: int, path: str, dim: int, n: int) -> Tuple[List[Dict], int]:
+    embeddings = np.memmap(path, dtype=np.float32, mode="r", shape=(n, dim))
+    ids = np.fromfile(f"{path}.ids", dtype=np.int64)
+    with open(f"{path}.txt", encoding="utf-8") as f:
+        texts = [json.loads(line) for line in f]
+
+    chunks = (
+        (ids[i:i + RECLUSTER_CHUNK_SIZE],
+         np.asarray(embeddings[i:i + RECLUSTER_CHUNK_SIZE]),
+         texts[i:i + RECLUSTER_CHUNK_SIZE])
+        for i in range(0, n, RECLUSTER_CHUNK_SIZE)
+    )
+    return cluster_chunks(category_id, chunks)
+
+
+# ==================================================
+# DRIVER
+# ==================================================
+def dump_category(category_id: int, tmp_dir: str) -> Optional[Tuple[str, int, int]]:
+    """Write the category's embeddings, ids and texts to files, returns (path, dim, rows)"""
+    path = os.path.join(tmp_dir, f"category_{category_id}.f32")
+    dim = None
+    n = 0
+
+    with open(path, "wb") as vec_file, open(f"{path}.ids", "wb") as id_file, \
+            open(f"{path}.txt", "w", encoding="utf-8") as text_file:
+        for chunk_ids, embeddings, chunk_texts in load_recluster_chunks(category_id):
+            vec_file.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+            id_file.write(np.asarray(chunk_ids, dtype=np.int64).tobytes())
+            text_file.writelines(json.dumps(t, ensure_ascii=False) + "\n" for t in chunk_texts)
+            dim = embeddings.shape[1]
+            n += len(chunk_ids)
+
+    if not n:
+        return None
+    return path, dim, n
+
+def recluster_categories(
+    category_ids: List[int],
+    workers: Optional[int] = RECLUSTER_WORKERS,
+    full_optimization: bool = True
+) -> Dict[int, Dict]:
+    """Full recluster of several categories in parallel, returns stats per category"""
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    workers = min(workers, len(category_ids))
+    results: Dict[int, Dict] = {}
+    empty = {"status": "no_articles", "articles": 0, "clusters_created": 0}
+
+    print(f"⚡ Reclustering {len(category_ids)} categories on {max(workers, 1)} processes")
+
+    with tempfile.TemporaryDirectory(prefix="recluster_") as tmp_dir:
+        if workers <= 1:
+            for category_id in category_ids:
+                job = dump_category(category_id, tmp_dir)
+                results[category_id] = dict(empty) if job is None else _apply(
+                    category_id, lambda: cluster_category_file(category_id, *job), full_optimization
+                )
+            return results
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures: Dict[Future, int] = {}
+
+            def apply_done(wait: bool):
+                # Single writer: results are applied one at a time, in the parent
+                ready = as_completed(list(futures)) if wait else [f for f in list(futures) if f.done()]
+                for future in ready:
+                    category_id = futures.pop(future)
+                    results[category_id] = _apply(category_id, future.result, full_optimization)
+
+            for category_id in category_ids:
+                job = dump_category(category_id, tmp_dir)
+                if job is None:
+                    results[category_id] = dict(empty)
+                    continue
+                futures[executor.submit(cluster_category_file, category_id, *job)] = category_id
+                apply_done(wait=False)
+
+            apply_done(wait=True)
+
+    return results
+
+def _apply(category_id: int, get_result: Callable, full_optimization: bool) -> Dict:
+    """Write one category's groups; a failed category is reported, not raised"""
+    try:
+        groups, n_articles = get_result()
+        start = time.time()
+        stats = apply_recluster(category_id, groups, n_articles, full_optimization)
+        print(f"  ✓ Category {category_id}: {stats['clusters_created']} clusters for "
+              f"{n_articles} articles (written in {time.time() - start:.2f}s)")
+        return stats
+    except Exception as e:
+        print(f"  ✗ Category {category_id}: {e}")
+        return {"status": "error", "error": str(e), "articles": 0, "clusters_created": 0}
@@ -0,0 +1,298 @@
+"""
+Two-stage crawl pipeline.
+
+Stage 1: I/O workers download raw feed / article bytes.
+Stage 2: a ProcessPoolExecutor turns bytes into entries and articles,
+so HTML parsing is no longer bound to the GIL of the I/O threads.
+
+Raw bytes wait in a bounded queue and the number of parse jobs in
+flight is capped, so downloads block when the parsers fall behind.
+The same parse stage is used by the asyncio engine (async_crawler).
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import (
+    CRAWL_MAX_WORKERS,
+    PARSE_WORKERS,
+    PARSE_QUEUE_SIZE,
+    INGEST_BATCH_SIZE,
+    INGEST_MAX_WAIT,
+    INGEST_QUEUE_SIZE,
+    FETCH_FULL_CONTENT,
+    MAX_ENTRIES_PER_FEED,
+)
+from crawler_utils import fetch_feed, fetch_text, feed_entries, build_article, extract_content, EXTRACTORS
+
+# (source, rss_url, entry) -> keep entry?
+EntryFilter = Callable[[str, str, Dict], bool]
+
+_STOP = object()
+
+
+def put_unless_stopped(q: queue.Queue, item, stop: threading.Event, poll: float = 0.2) -> bool:
+    """Blocking put that gives up once stop is set, returns whether item was queued"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=poll)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+# ==================================================
+# PARSE JOBS (run in worker processes, must be picklable)
+# ==================================================
+def parse_feed(body: bytes, limit: Optional[int] = MAX_ENTRIES_PER_FEED) -> List[Dict]:
+    return feed_entries(body, limit)
+
+def parse_article(source: str, category_slug: str, entry: Dict, html: Optional[str]) -> Optional[Dict]:
+    content = ""
+    if html:
+        try:
+            content = extract_content(source, html)
+        except Exception as e:
+            print(f"Error extracting {entry['link']}: {e}")
+
+    try:
+        return build_article(source, category_slug, entry, content)
+    except Exception:
+        return None
+
+def needs_download(source: str) -> bool:
+    return FETCH_FULL_CONTENT and source in EXTRACTORS
+
+# ==================================================
+# PARSE POOL
+# ==================================================
+class ParsePool:
+    """Process pool with a cap on parse jobs in flight"""
+
+    def __init__(self, workers: Optional[int] = PARSE_WORKERS, max_pending: int = PARSE_QUEUE_SIZE):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args) -> Future:
+        """Blocks while max_pending jobs are already in flight"""
+        self._slots.acquire()
+
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = self.executor.submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+_pool: Optional[ParsePool] = None
+_pool_lock = threading.Lock()
+
+def get_parse_pool() -> ParsePool:
+    """Shared pool, created once so worker processes are reused across cycles"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool()
+        return _pool
+
+# ==================================================
+# THREADED PIPELINE
+# ==================================================
+class CrawlPipeline:
+    """
+    Thread-based I/O stage + process-pool parse stage.
+    Used when the asyncio engine is disabled or aiohttp is missing.
+    """
+
+    def __init__(
+        self,
+        io_workers: int = CRAWL_MAX_WORKERS,
+        queue_size: int = PARSE_QUEUE_SIZE,
+        parse_pool: Optional[ParsePool] = None
+    ):
+        self.io_workers = io_workers
+        self.queue_size = queue_size
+        self.parse_pool = parse_pool
+
+    def _io_worker(self, jobs: queue.Queue, raw: queue.Queue):
+        while True:
+            job = jobs.get()
+            if job is _STOP:
+                return
+
+            kind = job[0]
+            if kind == "feed":
+                _, source, rss_url, category_slug = job
+                body = fetch_feed(rss_url)
+            else:
+                _, source, category_slug, entry = job
+                body = fetch_text(entry["link"]) if needs_download(source) else None
+
+            # Blocks when the parse stage is behind
+            raw.put((job, body))
+
+    def _dispatcher(self, pool: ParsePool, raw: queue.Queue, results: queue.Queue):
+        while True:
+            item = raw.get()
+            if item is _STOP:
+                return
+
+            job, body = item
+            if job[0] == "feed":
+                if body is None:
+                    results.put((job, []))
+                    continue
+                future = pool.submit(parse_feed, body)
+            else:
+                _, source, category_slug, entry = job
+                future = pool.submit(parse_article, source, category_slug, entry, body)
+
+            future.add_done_callback(lambda f, job=job: results.put((job, f)))
+
+    def run(
+        self,
+        sources: Iterable[Tuple[str, str, str]],
+        entry_filter: Optional[EntryFilter] = None
+    ) -> Iterator[Dict]:
+        """Yield articles as soon as they are parsed"""
+        pool = self.parse_pool or get_parse_pool()
+
+        jobs = queue.Queue()
+        raw = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue()
+
+        io_threads = [
+            threading.Thread(target=self._io_worker, args=(jobs, raw), daemon=True)
+            for _ in range(self.io_workers)
+        ]
+        dispatcher = threading.Thread(target=self._dispatcher, args=(pool, raw, results), daemon=True)
+        for t in io_threads + [dispatcher]:
+            t.start()
+
+        outstanding = 0
+        for source, rss_url, category_slug in sources:
+            jobs.put(("feed", source, rss_url, category_slug))
+            outstanding += 1
+
+        try:
+            while outstanding:
+                job, result = results.get()
+                outstanding -= 1
+
+                if isinstance(result, Future):
+                    try:
+                        result = result.result()
+                    except Exception as e:
+                        print(f"  Error in parse job: {e}")
+                        continue
+
+                if job[0] == "feed":
+                    _, source, rss_url, category_slug = job
+                    for entry in result:
+                        if entry_filter is None or entry_filter(source, rss_url, entry):
+                            jobs.put(("article", source, category_slug, entry))
+                            outstanding += 1
+                elif result:
+                    yield result
+        finally:
+            for _ in io_threads:
+                jobs.put(_STOP)
+            raw.put(_STOP)
+
+
+def crawl_pipeline(
+    sources: Iterable[Tuple[str, str, str]],
+    entry_filter: Optional[EntryFilter] = None
+) -> List[Dict]:
+    return list(CrawlPipeline().run(sources, entry_filter))
+
+
+# ==================================================
+# MICRO-BATCHING
+# ==================================================
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def micro_batches(
+    items: Iterable,
+    size: int = INGEST_BATCH_SIZE,
+    max_wait: float = INGEST_MAX_WAIT,
+    queue_size: int = INGEST_QUEUE_SIZE
+) -> Iterator[List]:
+    """
+    Group a slow iterator into lists of up to `size` items.
+    A batch is flushed `max_wait` seconds after its first item even if it
+    is not full. The iterator is drained by a thread into a bounded queue,
+    so it blocks when the consumer falls behind; closing the generator
+    stops that thread and closes the iterator.
+    """
+    buffer = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if not put_unless_stopped(buffer, item, stop):
+                    break
+        except Exception as e:
+            put_unless_stopped(buffer, _Failure(e), stop)
+        finally:
+            # Closing the source lets it release its own threads / sessions
+            if stop.is_set() and hasattr(items, "close"):
+                items.close()
+            put_unless_stopped(buffer, _STOP, stop)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    batch = []
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                item = buffer.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                yield batch
+                batch = []
+                continue
+
+            if item is _STOP:
+                break
+            if isinstance(item, _Failure):
+                print(f"  Error in article stream: {item.error}")
+                continue
+
+            if not batch:
+                deadline = time.monotonic() + max_wait
+            batch.append(item)
+
+            if len(batch) >= size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        # Consumer stopped early (error or close): unblock the producer
+        stop.set()
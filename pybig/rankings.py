@@ -0,0 +1,142 @@
+"""
+Precomputed homepage rankings and cluster representatives.
+
+Each cluster keeps its representative article (the newest one not hidden
+by reports) in clusters.representative_news_id / representative_published_at.
+The pipeline re-picks it whenever membership changes (assignment, merge,
+recluster), the Next.js report route whenever an article is reported
+(refreshClusterRepresentative in big_data/src/lib/db.js).
+
+After each hot score pass the scheduler rewrites cluster_rankings:
+
+    global     top RANKING_GLOBAL_SIZE clusters by hot_score
+    category   top RANKING_SIZE of each category (scope_id = category_id)
+    today      representative published today (local date), hot_score
+               minus 1e-5 per second of article age
+    trending   representative published within RANKING_TRENDING_HOURS
+
+Every row carries the representative, so the Next.js homepage reads one
+index range and joins by primary key instead of scoring and resolving
+articles per request. The table is replaced in one transaction.
+"""
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from db import cursor, conn
+from config import RANKING_GLOBAL_SIZE, RANKING_SIZE, RANKING_TRENDING_HOURS
+
+# Same rule as REPORT_FILTER in big_data/src/lib/actions/news.js
+REPORT_FILTER = "(report_count < 10 OR (report_count * 1.0 / MAX(view_count, 1) < 0.01))"
+
+
+# ==================================================
+# REPRESENTATIVES (do not commit, callers do)
+# ==================================================
+def _refresh(where: str, params: Tuple = ()):
+    cursor.execute(f"""
+        UPDATE clusters
+        SET representative_news_id = (
+            SELECT id
+            FROM news
+            WHERE cluster_id = clusters.id
+              AND {REPORT_FILTER}
+            ORDER BY published_at DESC
+            LIMIT 1
+        )
+        WHERE {where}
+    """, params)
+
+    cursor.execute(f"""
+        UPDATE clusters
+        SET representative_published_at = (
+            SELECT published_at FROM news WHERE id = clusters.representative_news_id
+        )
+        WHERE {where}
+    """, params)
+
+def _chunks(ids: List[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield chunk, ",".join("?" * len(chunk))
+
+def refresh_representatives(cluster_ids: Iterable[int]):
+    for chunk, marks in _chunks(list(cluster_ids)):
+        _refresh(f"id IN ({marks})", chunk)
+
+def refresh_representatives_of_news(news_ids: Iterable[int]):
+    """Re-pick the representative of the clusters these articles now belong to"""
+    for chunk, marks in _chunks(list(news_ids)):
+        _refresh(f"id IN (SELECT cluster_id FROM news WHERE id IN ({marks}))", chunk)
+
+def refresh_category_representatives(category_id: int):
+    _refresh("category_id = ?", (category_id,))
+
+def backfill_representatives() -> int:
+    """Pick representatives for clusters that have none yet, returns clusters checked"""
+    _refresh("representative_published_at IS NULL")
+    return cursor.rowcount
+
+
+# ==================================================
+# RANKINGS
+# ==================================================
+def _candidates() -> List[Tuple]:
+    """(cluster, category, hot_score, representative, published epoch, today?, trending?) by score"""
+    cursor.execute("""
+        SELECT id, category_id, hot_score, representative_news_id,
+               CAST(strftime('%s', representative_published_at) AS REAL),
+               representative_published_at >= date('now', 'localtime'),
+               representative_published_at >= datetime('now', ?)
+        FROM clusters
+        WHERE hot_score > 0
+          AND representative_news_id IS NOT NULL
+        ORDER BY hot_score DESC
+    """, (f"-{RANKING_TRENDING_HOURS} hours",))
+    return cursor.fetchall()
+
+def update_rankings() -> Dict[str, int]:
+    """Rebuild cluster_rankings, returns rows written per scope"""
+    candidates = _candidates()
+    now = time.time()
+
+    rows = []
+    per_category = defaultdict(int)
+    today, trending = [], []
+
+    for rank, (cid, category_id, score, news_id, published, is_today, is_trending) in enumerate(candidates):
+        if rank < RANKING_GLOBAL_SIZE:
+            rows.append(("global", 0, rank + 1, cid, news_id, score))
+
+        if per_category[category_id] < RANKING_SIZE:
+            per_category[category_id] += 1
+            rows.append(("category", category_id, per_category[category_id], cid, news_id, score))
+
+        if is_trending and len(trending) < RANKING_SIZE:
+            trending.append(("trending", 0, len(trending) + 1, cid, news_id, score))
+
+        if is_today:
+            today.append((score - (now - (published or now)) * 0.00001, cid, news_id))
+
+    today.sort(key=lambda t: -t[0])
+    rows.extend(trending)
+    rows.extend(
+        ("today", 0, rank + 1, cid, news_id, featured)
+        for rank, (featured, cid, news_id) in enumerate(today[:RANKING_SIZE])
+    )
+
+    try:
+        cursor.execute("DELETE FROM cluster_rankings")
+        cursor.executemany("""
+            INSERT INTO cluster_rankings (scope, scope_id, rank, cluster_id, news_id, score)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    counts = defaultdict(int)
+    for row in rows:
+        counts[row[0]] += 1
+    return dict(counts)
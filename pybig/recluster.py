@@ -1,7 +1,9 @@
 import sys
 from db import init_db, cursor
 from clustering import recluster_category
+from parallel_recluster import recluster_categories
 from hot_score import update_hot_scores
+from rankings import update_rankings
 
 def recluster_all():
     print("Initializing database...")
@@ -19,22 +21,25 @@ def recluster_all():
     total_clusters = 0
     total_articles = 0
     
+    results = recluster_categories([c[0] for c in categories])
+    
     for category_id, category_name, category_slug in categories:
-        print(f"Reclustering category: {category_name} (ID: {category_id})...")
-        try:
-            stats = recluster_category(category_id)
-            clusters_created = stats.get('clusters_created', 0)
-            articles_reclustered = stats.get('articles', 0)
-            
-            total_clusters += clusters_created
-            total_articles += articles_reclustered
-            
-            print(f"  ✓ Created {clusters_created} clusters for {articles_reclustered} articles\n")
-        except Exception as e:
-            print(f"  ✗ Error: {e}\n")
+        stats = results.get(category_id, {})
+        clusters_created = stats.get('clusters_created', 0)
+        articles_reclustered = stats.get('articles', 0)
+        
+        total_clusters += clusters_created
+        total_articles += articles_reclustered
+        
+        if stats.get('status') == 'error':
+            print(f"  ✗ {category_name}: {stats.get('error')}")
+        else:
+            print(f"  ✓ {category_name}: {clusters_created} clusters for {articles_reclustered} articles")
+    print()
     
     print("Updating hot scores...")
     update_hot_scores()
+    update_rankings()
     
     print(f"\n=== COMPLETED ===")
     print(f"Total clusters created: {total_clusters}")
@@ -61,6 +66,7 @@ def recluster_category_by_slug(category_slug: str):
         
         print("\nUpdating hot scores...")
         update_hot_scores()
+        update_rankings()
         print("✓ Done!")
     except Exception as e:
         print(f"✗ Error: {e}")
@@ -0,0 +1,101 @@
+"""
+In-memory URL membership index.
+
+Holds a 64-bit hash of the normalized form of every URL in `news` (rows
+keep the original link, only the keys are normalized), so RSS entries
+that are already stored are dropped before their article page is
+fetched. Warmed from the database at startup and updated on insert.
+"""
+import hashlib
+import threading
+from typing import Iterable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from db import conn
+
+# Query params that only carry tracking info
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "zarsrc", "gidzl",
+    "cmpid", "_ga", "mc_cid", "mc_eid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form: lowercase scheme/host, no fragment, no tracking params"""
+    if not url:
+        return ""
+
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    netloc = parts.netloc.lower()
+    if netloc.endswith(":80") and parts.scheme == "http":
+        netloc = netloc[:-3]
+    elif netloc.endswith(":443") and parts.scheme == "https":
+        netloc = netloc[:-4]
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    return urlunsplit((parts.scheme.lower(), netloc, path, urlencode(query), ""))
+
+
+def _url_key(url: str) -> int:
+    digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class UrlIndex:
+    """Hashed set of stored URLs, thread-safe"""
+
+    def __init__(self):
+        self._keys = set()
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def warm(self, batch_size: int = 10000) -> int:
+        """Load every URL from the news table"""
+        cur = conn.execute("SELECT url FROM news WHERE url IS NOT NULL")
+        keys = set()
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            keys.update(_url_key(url) for (url,) in rows)
+
+        with self._lock:
+            self._keys |= keys
+            self.warmed = True
+        return len(keys)
+
+    def __contains__(self, url: str) -> bool:
+        if not self.warmed:
+            self.warm()
+        key = _url_key(url)
+        with self._lock:
+            return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, url: str):
+        key = _url_key(url)
+        with self._lock:
+            self._keys.add(key)
+
+    def add_many(self, urls: Iterable[str]):
+        keys = {_url_key(u) for u in urls if u}
+        with self._lock:
+            self._keys |= keys
+
+
+url_index = UrlIndex()
@@ -0,0 +1,130 @@
+"""
+View event ingestion.
+
+The Next.js view route appends one row to view_events per page view and
+returns; nothing else is written on the request path. drain() takes the
+oldest VIEW_INGEST_BATCH events inside one write transaction and:
+
+    - adds the per-article counts to news.view_count
+    - copies member views into read_logs, already processed
+    - adds views / reads to cluster_stats (hourly bucket of the view)
+    - re-picks the representative and hot score of the touched clusters only
+    - deletes the drained events
+
+main.py drains once per cycle; `python view_ingest.py [interval]` runs
+next to the web app to keep counters fresher. Both may run at once: the
+batch is read after the write lock is taken, so no event counts twice.
+"""
+import sys
+import time
+from collections import Counter
+
+from db import init_db, cursor, conn
+from config import VIEW_INGEST_BATCH, VIEW_INGEST_INTERVAL
+from hot_score import update_cluster_hot_scores
+import cluster_stats
+import rankings
+
+
+def drain(limit: int = VIEW_INGEST_BATCH) -> int:
+    """
+    Apply one batch of view events, returns events consumed. Commits or
+    rolls back its own transaction, so it refuses to run inside one of
+    the caller's.
+    """
+    if conn.in_transaction:
+        raise RuntimeError("view_ingest.drain() needs its own transaction, commit the caller's work first")
+    cursor.execute("BEGIN IMMEDIATE")
+
+    try:
+        # A deleted user counts as an anonymous view, a deleted article drops
+        # the event: neither may fail the batch on a foreign key
+        cursor.execute("""
+            SELECT e.id, n.id, u.id, e.url, e.viewed_at,
+                   CAST(strftime('%s', e.viewed_at) AS INTEGER) / 3600,
+                   n.cluster_id
+            FROM view_events e
+            LEFT JOIN news n ON n.id = e.news_id
+            LEFT JOIN users u ON u.id = e.user_id
+            ORDER BY e.id
+            LIMIT ?
+        """, (limit,))
+        batch = cursor.fetchall()
+        if not batch:
+            conn.commit()
+            return 0
+
+        last_id = batch[-1][0]
+        events = [e for e in batch if e[1] is not None]
+        if len(events) < len(batch):
+            print(f"  ⚠ Dropped {len(batch) - len(events)} view events for deleted articles")
+
+        per_news = Counter(news_id for _, news_id, *_ in events)
+        cursor.executemany(
+            "UPDATE news SET view_count = view_count + ? WHERE id = ?",
+            [(count, news_id) for news_id, count in per_news.items()]
+        )
+
+        # Member views feed recommendations; already counted in cluster_stats
+        cursor.executemany("""
+            INSERT INTO read_logs (user_id, news_id, url, read_at, processed)
+            SELECT u.id, n.id, COALESCE(?, n.url), ?, 1
+            FROM news n
+            JOIN users u ON u.id = ?
+            WHERE n.id = ?
+        """, [
+            (url, viewed_at, user_id, news_id)
+            for _, news_id, user_id, url, viewed_at, _, _ in events
+            if user_id is not None
+        ])
+
+        views, reads = Counter(), Counter()
+        for _, _, user_id, _, _, bucket, cluster_id in events:
+            if cluster_id is None:
+                continue
+            views[(cluster_id, bucket)] += 1
+            if user_id is not None:
+                reads[(cluster_id, bucket)] += 1
+
+        cluster_stats.add_views(
+            (cluster_id, bucket, count, reads[(cluster_id, bucket)])
+            for (cluster_id, bucket), count in views.items()
+        )
+
+        # View counts move the report filter, so representatives can change too
+        touched = sorted({cluster_id for cluster_id, _ in views})
+        rankings.refresh_representatives(touched)
+        update_cluster_hot_scores(touched)
+
+        cursor.execute("DELETE FROM view_events WHERE id <= ?", (last_id,))
+        conn.commit()
+        return len(batch)
+    except Exception:
+        conn.rollback()
+        raise
+
+def drain_all() -> int:
+    """Drain until the spool is empty, returns events consumed"""
+    total = 0
+    while True:
+        drained = drain()
+        total += drained
+        if drained < VIEW_INGEST_BATCH:
+            return total
+
+def run(interval: float = VIEW_INGEST_INTERVAL):
+    init_db()
+    print(f"⚡ Draining view_events every {interval:g}s")
+
+    while True:
+        try:
+            drained = drain_all()
+            if drained:
+                print(f"[{time.strftime('%H:%M:%S')}] ✓ Ingested {drained} view events")
+        except Exception as e:
+            print(f"✗ View ingest error: {e}")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else VIEW_INGEST_INTERVAL)